@@ -4,9 +4,11 @@ List and manage saved Excel files
 """
 from fastapi import APIRouter, HTTPException, status, Query, UploadFile, File, Form
 from typing import List
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, FileResponse
+from starlette.background import BackgroundTask
 from pathlib import Path
 import logging
+import os
 from typing import List, Optional
 
 from app.services.file_manager import file_manager
@@ -131,13 +133,11 @@ async def download_saved_file(process_id: str, file_index: Optional[int] = Query
                         }
                     )
                 
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                
                 filename = part_metadata.get('filename', f"mega-sena-{process_id[:8]}-part{file_index + 1}.xlsx")
                 
-                return Response(
-                    content=content,
+                # FileResponse envia direto do disco (sendfile), sem carregar o arquivo em memória
+                return FileResponse(
+                    file_path,
                     media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     headers={
                         "Content-Disposition": f"attachment; filename={filename}"
@@ -145,28 +145,34 @@ async def download_saved_file(process_id: str, file_index: Optional[int] = Query
                 )
             else:
                 # Download all files as ZIP
+                # O ZIP é montado em arquivo temporário e enviado do disco (removido após o envio)
                 import zipfile
-                import io
+                import tempfile
                 
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for idx, part_file_stem in enumerate(part_files):
-                        part_process_id = part_file_stem.replace('.json', '')
-                        part_metadata = file_manager.get_file_metadata(part_process_id)
-                        if part_metadata:
-                            part_path = Path(part_metadata.get('file_path', ''))
-                            if part_path.exists():
-                                zip_file.write(part_path, part_metadata.get('filename', f"part{idx + 1}.xlsx"))
+                zip_buffer = tempfile.NamedTemporaryFile(suffix=".zip", delete=False)
+                try:
+                    with zip_buffer, zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                        for idx, part_file_stem in enumerate(part_files):
+                            part_process_id = part_file_stem.replace('.json', '')
+                            part_metadata = file_manager.get_file_metadata(part_process_id)
+                            if part_metadata:
+                                part_path = Path(part_metadata.get('file_path', ''))
+                                if part_path.exists():
+                                    zip_file.write(part_path, part_metadata.get('filename', f"part{idx + 1}.xlsx"))
+                except BaseException:
+                    # Falha na montagem: o temporário (delete=False) não chega ao FileResponse
+                    os.unlink(zip_buffer.name)
+                    raise
                 
-                zip_buffer.seek(0)
                 zip_filename = f"mega-sena-{process_id[:8]}-all-files.zip"
                 
-                return Response(
-                    content=zip_buffer.getvalue(),
+                return FileResponse(
+                    zip_buffer.name,
                     media_type="application/zip",
                     headers={
                         "Content-Disposition": f"attachment; filename={zip_filename}"
-                    }
+                    },
+                    background=BackgroundTask(os.unlink, zip_buffer.name)
                 )
         else:
             # Single file
@@ -182,13 +188,10 @@ async def download_saved_file(process_id: str, file_index: Optional[int] = Query
                     }
                 )
             
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
             filename = metadata.get('filename', f"mega-sena-{process_id[:8]}.xlsx")
             
-            return Response(
-                content=content,
+            return FileResponse(
+                file_path,
                 media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 headers={
                     "Content-Disposition": f"attachment; filename={filename}"
@@ -2,9 +2,10 @@
 Job status and download API endpoints
 """
 from fastapi import APIRouter, HTTPException, status, Query
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, FileResponse
 from typing import Optional
 import logging
+import os
 
 from app.models.jobs import JobInfo
 from app.services.job_processor import job_processor
@@ -14,6 +15,29 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _saved_file_response(file_path: str, filename: str, process_id: str):
+    """
+    FileResponse de um Excel salvo em disco durante o job
+    O arquivo pode ter sido apagado depois (DELETE /files/{process_id}): 404 ao invés de falhar no envio
+    """
+    if not os.path.isfile(file_path):
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "code": "FILE_NOT_FOUND",
+                "message": f"File with process_id {process_id} not found",
+                "field": "process_id"
+            }
+        )
+    return FileResponse(
+        file_path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
 @router.get("/jobs/{process_id}/status", response_model=JobInfo)
 async def get_job_status(process_id: str):
     """
@@ -114,8 +138,12 @@ async def download_job_result(process_id: str, file_index: Optional[int] = None)
                 }
             )
         
-        # Return specific file
+        # Return specific file (incrementally saved files are served from disk)
         excel_bytes = excel_result[file_index - 1]
+        if isinstance(excel_bytes, str):
+            return _saved_file_response(
+                excel_bytes, f"mega-sena-games-{process_id[:8]}-part{file_index}.xlsx", process_id
+            )
         return Response(
             content=excel_bytes,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -124,7 +152,9 @@ async def download_job_result(process_id: str, file_index: Optional[int] = None)
             }
         )
     
-    # Single file
+    # Single file (saved to disk during the job: served from its path)
+    if isinstance(excel_result, str):
+        return _saved_file_response(excel_result, f"mega-sena-games-{process_id[:8]}.xlsx", process_id)
     return Response(
         content=excel_result,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
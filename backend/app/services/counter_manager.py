@@ -11,6 +11,24 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# orjson é opcional: o contador é salvo a cada 50 incrementos, e o encode/decode fica bem mais rápido
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dump_counter_data(data: Dict) -> bytes:
+    """Estado do contador serializado com indentação de 2 espaços"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _load_counter_data(raw: bytes) -> Dict:
+    """Desserializa o estado do contador (erros de ambos os backends são ValueError)"""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
 
 class CounterManager:
     """
@@ -44,8 +62,8 @@ class CounterManager:
         if not self._persist_file or not os.path.exists(self._persist_file):
             return
         
-        with open(self._persist_file, 'r') as f:
-            data = json.load(f)
+        with open(self._persist_file, 'rb') as f:
+            data = _load_counter_data(f.read())
         
         with self._lock:
             for num, count in data.get('counter', {}).items():
@@ -84,9 +102,10 @@ class CounterManager:
             
             # Use atomic write (write to temp file, then rename)
             temp_file = str(persist_path) + '.tmp'
+            payload = _dump_counter_data(data)
             try:
-                with open(temp_file, 'w') as f:
-                    json.dump(data, f, indent=2)
+                with open(temp_file, 'wb') as f:
+                    f.write(payload)
                 
                 # Atomic rename - use os.replace for atomicity
                 import os
@@ -100,16 +119,16 @@ class CounterManager:
                     logger.error(f"❌ Counter file was not created after save: {self._persist_file}")
                     # Fallback: write directly
                     logger.warning(f"⚠️ Attempting direct write as fallback")
-                    with open(self._persist_file, 'w') as f:
-                        json.dump(data, f, indent=2)
+                    with open(self._persist_file, 'wb') as f:
+                        f.write(payload)
                     if os.path.exists(self._persist_file):
                         logger.info(f"✅ Counter file created via fallback: {self._persist_file}")
             except Exception as write_error:
                 logger.error(f"❌ Error writing counter file: {write_error}", exc_info=True)
                 # Final fallback: try direct write
                 try:
-                    with open(self._persist_file, 'w') as f:
-                        json.dump(data, f, indent=2)
+                    with open(self._persist_file, 'wb') as f:
+                        f.write(payload)
                     logger.info(f"✅ Counter file created via final fallback: {self._persist_file}")
                 except Exception as final_error:
                     logger.error(f"❌ Final fallback also failed: {final_error}", exc_info=True)
@@ -198,8 +217,8 @@ class CounterManager:
                     'counter': {str(i): 0 for i in range(1, 61)},
                     'total_generated': 0
                 }
-                with open(self._persist_file, 'w') as f:
-                    json.dump(initial_data, f, indent=2)
+                with open(self._persist_file, 'wb') as f:
+                    f.write(_dump_counter_data(initial_data))
                 if os.path.exists(self._persist_file):
                     logger.info(f"✅ Created counter file manually as fallback: {self._persist_file}")
                 else:
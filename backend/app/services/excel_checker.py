@@ -33,7 +33,8 @@ class ExcelChecker:
             raise ValueError("Drawn numbers must be 6 unique numbers")
         
         # Load workbook from bytes
-        workbook = load_workbook(io.BytesIO(file_content), data_only=True)
+        # read_only: rows are streamed from the sheet XML instead of loading every cell
+        workbook = load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
         
         # Try to find the "Generated Games" sheet
         games_sheet = None
@@ -56,18 +57,19 @@ class ExcelChecker:
         senas = 0
         total_games = 0
         
-        # Find the start row (usually row 4, after headers)
-        start_row = 4
-        max_row = games_sheet.max_row
+        # Number columns come from the "Número N" headers (row 3), so the Acertos column
+        # that follows them is never read as a game number
+        header = next(games_sheet.iter_rows(min_row=3, max_row=3, values_only=True), ())
+        numbers_per_row = sum(
+            1 for value in header if isinstance(value, str) and value.startswith("Número")
+        ) or 19  # Support up to 17 numbers per game
         
-        # Check each row for games
-        for row_idx in range(start_row, max_row + 1):
+        # Check each row for games (usually from row 4, after headers), one tuple per row
+        for row in games_sheet.iter_rows(min_row=4, max_col=numbers_per_row, values_only=True):
             game_numbers = []
             
             # Read numbers from columns (support variable number of columns)
-            for col_idx in range(1, 20):  # Support up to 17 numbers per game
-                cell_value = games_sheet.cell(row=row_idx, column=col_idx).value
-                
+            for cell_value in row:
                 # Stop if we hit an empty cell or non-numeric value
                 if cell_value is None:
                     break
@@ -94,6 +96,8 @@ class ExcelChecker:
                 elif matches == 6:
                     senas += 1
         
+        workbook.close()
+        
         return {
             "quadras": quadras,
             "quinas": quinas,
@@ -3,16 +3,35 @@ Excel file generation with validation and multiple sheets
 Supports streaming for large volumes to avoid memory issues
 """
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.comments import Comment
 from openpyxl.utils import get_column_letter
 from openpyxl.formatting.rule import FormulaRule
-from typing import List, Optional, Iterator, Union, Callable
+from typing import IO, Deque, List, Optional, Iterable, Iterator, Union, Callable, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, islice
+from pathlib import Path
+from collections import deque
+import csv
+import gc
+import gzip
+import heapq
 import io
 import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
 import time
+import zipfile
+import numpy as np
 from app.models.generation import GameConstraints
 from app.services.historical_data import historical_data_service
 
@@ -23,47 +42,491 @@ logger = logging.getLogger(__name__)
 EXCEL_MAX_ROWS = 1_048_576
 EXCEL_MAX_GAMES_PER_FILE = 1_000_000  # Safe limit with headers
 
+# Acima deste volume a aba "Jogos Gerados" é escrita direto em XML (sem objetos Cell do openpyxl)
+DIRECT_XML_MIN_GAMES = 100_000
+
+# Acima deste volume a formatação condicional de acertos (opcional) não é registrada
+FORMATTING_MAX_ROWS = 1000
+
+# Threads usadas para ordenar (e despejar em disco) os chunks de jogos em paralelo.
+# Threads e não processos: o sort do NumPy e a escrita do spill liberam o GIL, e serializar
+# um chunk para outro processo custa mais que ordená-lo
+SORT_WORKERS = os.cpu_count() or 1
+
+# Nível de deflate do pacote com linhas injetadas: com 1M de jogos, o nível 3 salva ~25%
+# mais rápido que o padrão (6) e gera um arquivo ~18% maior (o nível 1 é maior e não é mais rápido)
+ZIP_COMPRESS_LEVEL = 3
+
+# Letras de coluna pré-calculadas (índice 1-based, como no openpyxl)
+_COL_LETTERS = (None,) + tuple(get_column_letter(i) for i in range(1, 65))
+
+# Células da entrada manual referenciadas pelas fórmulas de acertos
+_MANUAL_RANGE_REF = "'Entrada Manual'!$A$6:$F$6"
+
+# Estilos imutáveis criados uma vez no import e compartilhados por todas as instâncias
+# de ExcelGenerator (cada worker de processo/Ray cria a sua): atribuídos por referência
+_HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+_HEADER_FONT = Font(bold=True, color="FFFFFF")
+_MATCH_FILL = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
+_GREEN_FILL = PatternFill(start_color="92D050", end_color="92D050", fill_type="solid")
+_THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+_CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+_BOLD_FONT = Font(bold=True)
+_TITLE_FONT = Font(bold=True, size=14)
+_SECTION_FONT = Font(bold=True, size=12)
+_SUMMARY_FONT = Font(bold=True, size=11)
+_WARNING_FONT = Font(bold=True, size=12, color="FF0000")
+_ITALIC_FONT = Font(italic=True)
+_WRAP_TOP_ALIGN = Alignment(wrap_text=True, vertical='top')
+
+# Estilos nomeados das células de jogos (normal e destacada por acerto)
+GAME_CELL_STYLE = "game_cell"
+GAME_CELL_MATCH_STYLE = "game_cell_match"
+# Estilo nomeado dos cabeçalhos de colunas (Número 1..k / Acertos)
+HEADER_CELL_STYLE = "header_cell"
+
+
+@lru_cache(maxsize=None)
+def _match_formula_template(numbers_per_game: int) -> str:
+    """Template da fórmula de acertos de uma linha (formatar com % (row, row)); montado uma vez por tamanho de jogo"""
+    return f"=SUMPRODUCT(COUNTIF({_MANUAL_RANGE_REF},A%d:{_COL_LETTERS[numbers_per_game]}%d))"
+
+
+@lru_cache(maxsize=None)
+def _game_row_emitter(numbers_per_game: int) -> Callable[[Iterable[int], List[WriteOnlyCell], WriteOnlyCell], list]:
+    """
+    Gera (uma vez por tamanho de jogo) a função que monta a linha de células de um jogo:
+    emit(game, number_cells, last_cell) -> [number_cells[game[0]], ..., number_cells[game[k-1]], last_cell]
+    Indexação desenrolada no código gerado: sem list comprehension nem laço por célula em cada linha
+    """
+    numbers = ", ".join(f"g{i}" for i in range(numbers_per_game))
+    cells = ", ".join(f"number_cells[g{i}]" for i in range(numbers_per_game))
+    source = (
+        f"def emit(game, number_cells, last_cell):\n"
+        f"    {numbers}, = game\n"
+        f"    return [{cells}, last_cell]\n"
+    )
+    namespace: dict = {}
+    exec(source, namespace)
+    return namespace["emit"]
+
+
+@lru_cache(maxsize=1)
+def _valid_numbers_cached(last_update: Optional[datetime]) -> Tuple[Tuple[int, ...], str]:
+    """
+    Números válidos e a fórmula da lista suspensa ("1,2,...,60"), compartilhados por
+    todos os ExcelGenerator do processo; a chave last_update refaz o cache quando os
+    dados históricos são recarregados
+    """
+    valid_numbers = tuple(int(n) for n in historical_data_service.get_all_numbers())
+    return valid_numbers, '"' + ",".join(map(str, valid_numbers)) + '"'
+
+
+@lru_cache(maxsize=None)
+def _games_header_labels(numbers_per_game: int) -> Tuple[str, ...]:
+    """Rótulos do cabeçalho da aba de jogos ("Número 1".."Número k", "Acertos"), montados uma vez por k"""
+    return tuple(f"Número {i}" for i in range(1, numbers_per_game + 1)) + ("Acertos",)
+
+
+def _manual_bitmap(manual_numbers: Optional[List[int]]) -> int:
+    """Bitmap de 64 bits dos números manuais (bit n ligado = número n escolhido); 0 se não houver"""
+    manual_bitmap = 0
+    for number in manual_numbers or ():
+        manual_bitmap |= 1 << number
+    return manual_bitmap
+
+
+def _manual_lookup(manual_bitmap: int) -> bytearray:
+    """Tabela indexada pelo número (0-63): 1 se o número está na entrada manual"""
+    return bytearray((manual_bitmap >> number) & 1 for number in range(64))
+
+
+@lru_cache(maxsize=8)
+def _xml_game_cells(
+    manual_bitmap: int,
+    numbers_per_game: int,
+    normal_style_id: int,
+    match_style_id: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Células <c> pré-serializadas da escrita direta em XML, montadas uma vez por entrada manual
+    (e não a cada lote): por número (0-63, destaque = número manual) e por total de acertos
+    Sem entrada manual nenhuma célula é destacada e a pertinência nem é consultada
+    Os arrays são só lidos (indexação), por isso podem ser compartilhados entre lotes
+    
+    Os números ficam como valores numéricos (tipo padrão, sem atributo t): via sharedStrings
+    cada célula ficaria maior (t="s" + índice) e viraria texto para o COUNTIF e a conferência
+    """
+    is_manual = _manual_lookup(manual_bitmap) if manual_bitmap else bytes(64)
+    number_cells = np.array([
+        f'<c s="{match_style_id if flag else normal_style_id}"><v>{number}</v></c>'
+        for number, flag in enumerate(is_manual)
+    ], dtype=object)
+    count_cells = np.array([
+        f'<c s="{match_style_id if count else normal_style_id}"><v>{count}</v></c>'
+        for count in range(numbers_per_game + 1)
+    ], dtype=object)
+    return number_cells, count_cells
+
+
+def _compute_match_counts(games: Union[List[List[int]], np.ndarray], manual_bitmap: int) -> List[int]:
+    """
+    Calcula o total de acertos por jogo para um lote inteiro
+    Recebe o bitmap dos números manuais (_manual_bitmap) e faz um único shift vetorizado no NumPy
+    """
+    return _match_counts_array(games, manual_bitmap).tolist()
+
+
+def _match_counts_array(games: Union[List[List[int]], np.ndarray], manual_bitmap: int) -> np.ndarray:
+    """Mesmo cálculo de _compute_match_counts, devolvendo o array de acertos (sem tolist)"""
+    games_arr = np.asarray(games, dtype=np.uint64)
+    mask = (np.uint64(manual_bitmap) >> games_arr) & np.uint64(1)
+    return mask.sum(axis=1)
+
+
+# Cada número (1-60) cabe em 6 bits: até 10 números por jogo empacotados num uint64
+_PACK_BITS = 6
+_PACK_MAX_NUMBERS = 64 // _PACK_BITS
+
+
+def _games_array(games: Union[List[List[int]], np.ndarray], dtype) -> np.ndarray:
+    """
+    Converte um chunk de jogos (todos com a mesma quantidade de números) num array (N, k)
+    np.fromiter sobre os números achatados evita a inspeção de lista por lista do np.asarray
+    Um chunk que já é array (fatia de um int8 (N, k)) só é convertido/copiado para o dtype
+    """
+    if isinstance(games, np.ndarray):
+        return games.astype(dtype)
+    numbers_per_game = len(games[0])
+    flat = np.fromiter(chain.from_iterable(games), dtype=dtype, count=len(games) * numbers_per_game)
+    return flat.reshape(len(games), numbers_per_game)
+
+
+def _sort_game_rows(arr: np.ndarray):
+    """
+    Ordena os números dentro de cada jogo (in-place), em lote
+    Os geradores já entregam jogos em ordem crescente: uma comparação vetorizada das colunas
+    vizinhas custa metade do sort por linha e permite pulá-lo
+    """
+    if arr.shape[1] > 1 and not (arr[:, 1:] > arr[:, :-1]).all():
+        arr.sort(axis=1)
+
+
+def _pack_games_chunk(games: Union[List[List[int]], np.ndarray]) -> np.ndarray:
+    """
+    Ordena um chunk de jogos e devolve cada jogo empacotado como um inteiro (uint64)
+    Os números ordenados ocupam faixas de 6 bits, do mais significativo ao menos significativo,
+    então a ordem dos inteiros é a mesma ordem lexicográfica dos jogos
+    """
+    arr = _games_array(games, np.uint64)
+    _sort_game_rows(arr)
+    shifts = np.arange(arr.shape[1] - 1, -1, -1, dtype=np.uint64) * np.uint64(_PACK_BITS)
+    packed = np.bitwise_or.reduce(arr << shifts, axis=1)
+    packed.sort()
+    return packed
+
+
+def _unpack_games(packed: Union[List[int], np.ndarray], numbers_per_game: int) -> List[List[int]]:
+    """Desempacota jogos gerados por _pack_games_chunk de volta em listas de números"""
+    return _unpack_games_array(packed, numbers_per_game).tolist()
+
+
+def _unpack_games_array(packed: Union[List[int], np.ndarray], numbers_per_game: int) -> np.ndarray:
+    """Desempacota jogos gerados por _pack_games_chunk num array (N, k), sem criar listas"""
+    arr = np.asarray(packed, dtype=np.uint64)
+    shifts = np.arange(numbers_per_game - 1, -1, -1, dtype=np.uint64) * np.uint64(_PACK_BITS)
+    return (arr[:, None] >> shifts) & np.uint64((1 << _PACK_BITS) - 1)
+
+
+def _sort_games_chunk(games: Union[List[List[int]], np.ndarray]) -> np.ndarray:
+    """
+    Ordena um chunk de jogos: números dentro de cada jogo e depois os jogos lexicograficamente
+    Feito em lote no NumPy (sort por linha + lexsort) ao invés de sorted() por jogo
+    """
+    arr = _games_array(games, np.int8)
+    _sort_game_rows(arr)
+    # lexsort usa a última chave como primária: passar as colunas invertidas
+    order = np.lexsort(arr.T[::-1])
+    return arr[order]
+
+
+def _game_chunks(games: Union[Iterable[List[int]], np.ndarray], chunk_size: int) -> Iterator:
+    """
+    Divide os jogos em chunks de até chunk_size para ordenação
+    Array (N, k): fatias do array, sem passar jogo a jogo pelo Python.
+    Iteráveis: listas montadas por islice (laço em C), sem append/contador/teste de tamanho por jogo;
+    a ordenação dentro de cada jogo é feita em lote no sort do chunk
+    """
+    if isinstance(games, np.ndarray):
+        for start in range(0, len(games), chunk_size):
+            yield games[start:start + chunk_size]
+        return
+    games = iter(games)
+    while True:
+        chunk = list(islice(games, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _SortedRuns:
+    """
+    Runs (chunks) de jogos já ordenados, lidos de volta em blocos para o k-way merge
+    Com spill=True cada run vai para um arquivo temporário assim que fica pronto: a memória
+    fica em O(bloco × runs) durante o merge, ao invés de O(total de jogos)
+    """
+    
+    _BLOCK_ROWS = 8192
+    
+    def __init__(self, spill: bool):
+        self._spool = tempfile.TemporaryFile() if spill else None
+        self._spool_size = 0
+        self._spool_lock = threading.Lock()
+        self._runs: list = []
+        self._packed = True
+    
+    def __len__(self) -> int:
+        return len(self._runs)
+    
+    def sort_and_store(self, sort_fn: Callable[[list], np.ndarray], chunk) -> Union[np.ndarray, tuple]:
+        """
+        Ordena um chunk e, com spill, já o grava no arquivo temporário (roda nas threads de sort)
+        Retorna o que add() registra: o próprio array ou a posição (offset, shape, dtype) no arquivo
+        """
+        run = sort_fn(chunk)
+        if self._spool is None:
+            return run
+        data = run.tobytes()
+        # Runs gravados um após o outro; o offset é controlado aqui (tell() forçaria um flush)
+        with self._spool_lock:
+            offset = self._spool_size
+            self._spool.write(data)
+            self._spool_size += len(data)
+        return offset, run.shape, run.dtype
+    
+    def add(self, run: Union[np.ndarray, tuple]):
+        """Registra um run devolvido por sort_and_store (a ordem dos runs não importa para o merge)"""
+        # Runs 1-D são jogos empacotados (uint64); 2-D, jogos (N, k) ordenados por lexsort
+        ndim = run.ndim if isinstance(run, np.ndarray) else len(run[1])
+        self._packed = self._packed and ndim == 1
+        self._runs.append(run)
+    
+    def iterators(self) -> List[Iterator]:
+        """Um iterador por run (ints empacotados ou listas de números), para o heapq.merge"""
+        return [self._iter_rows(blocks) for blocks in self._run_blocks()]
+    
+    def merged_batches(self, batch_size: int) -> Iterator:
+        """
+        Jogos de todos os runs em ordem global, em lotes de batch_size (só o último pode ser menor)
+        Runs empacotados são mesclados bloco a bloco no NumPy (lotes uint64); os demais passam
+        pelo heapq.merge linha a linha (lotes de listas)
+        """
+        if self._packed:
+            return self._rebatch(self._merge_packed_blocks(), batch_size)
+        merged = heapq.merge(*self.iterators())
+        return iter(lambda: list(islice(merged, batch_size)), [])
+    
+    def _merge_packed_blocks(self) -> Iterator[np.ndarray]:
+        """
+        Merge vetorizado dos runs empacotados: com um bloco carregado por run, tudo que é <= ao
+        menor último valor entre os blocos já está na posição final; essa parte de cada bloco é
+        concatenada, ordenada e emitida. O run dono desse menor valor sempre esvazia o bloco
+        (carrega o próximo), então cada passo avança pelo menos um bloco
+        """
+        readers = [iter(blocks) for blocks in self._run_blocks()]
+        heads = [next(reader, None) for reader in readers]
+        active = [i for i, head in enumerate(heads) if head is not None and len(head)]
+        while active:
+            bound = min(heads[i][-1] for i in active)
+            parts = []
+            still_active = []
+            for i in active:
+                head = heads[i]
+                cut = int(np.searchsorted(head, bound, side='right'))
+                parts.append(head[:cut])
+                head = head[cut:]
+                if not len(head):
+                    head = next(readers[i], None)
+                heads[i] = head
+                if head is not None and len(head):
+                    still_active.append(i)
+            active = still_active
+            merged = np.concatenate(parts)
+            merged.sort()
+            yield merged
+    
+    @staticmethod
+    def _rebatch(blocks: Iterator[np.ndarray], batch_size: int) -> Iterator[np.ndarray]:
+        """Reagrupa blocos de tamanhos variados em lotes de exatamente batch_size (exceto o último)"""
+        pending: List[np.ndarray] = []
+        pending_size = 0
+        for block in blocks:
+            pending.append(block)
+            pending_size += len(block)
+            if pending_size < batch_size:
+                continue
+            merged = np.concatenate(pending)
+            full = len(merged) - len(merged) % batch_size
+            for start in range(0, full, batch_size):
+                yield merged[start:start + batch_size]
+            pending = [merged[full:]]
+            pending_size = len(merged) - full
+        if pending_size:
+            yield np.concatenate(pending)
+    
+    def _run_blocks(self) -> List[Iterator[np.ndarray]]:
+        """Um iterador de blocos (arrays de até _BLOCK_ROWS linhas) por run"""
+        if self._spool is None:
+            return [self._array_blocks(run) for run in self._runs]
+        return [self._spilled_blocks(*run) for run in self._runs]
+    
+    @staticmethod
+    def _iter_rows(blocks: Iterator[np.ndarray]) -> Iterator:
+        for block in blocks:
+            yield from block.tolist()
+    
+    def _array_blocks(self, run: np.ndarray) -> Iterator[np.ndarray]:
+        for start in range(0, len(run), self._BLOCK_ROWS):
+            yield run[start:start + self._BLOCK_ROWS]
+    
+    def _spilled_blocks(self, offset: int, shape: Tuple[int, ...], dtype) -> Iterator[np.ndarray]:
+        # Cada leitura posiciona o arquivo: os runs são consumidos intercalados pelo merge
+        row_shape = shape[1:]
+        row_bytes = dtype.itemsize * int(np.prod(row_shape, dtype=np.int64))
+        for start in range(0, shape[0], self._BLOCK_ROWS):
+            rows = min(self._BLOCK_ROWS, shape[0] - start)
+            self._spool.seek(offset + start * row_bytes)
+            block = np.frombuffer(self._spool.read(rows * row_bytes), dtype=dtype)
+            yield block.reshape((rows,) + row_shape)
+    
+    def close(self):
+        self._runs.clear()
+        if self._spool is not None:
+            self._spool.close()
+
+
+# gc.freeze/unfreeze valem para o processo inteiro: escritas concorrentes (jobs em threads)
+# compartilham um contador, o primeiro a entrar congela e o último a sair descongela
+_gc_freeze_lock = threading.Lock()
+_gc_freeze_depth = 0
+
+
+@contextmanager
+def _frozen_gc():
+    """
+    Congela (gc.freeze) os objetos já existentes durante a escrita dos jogos: a lista de jogos
+    de entrada e demais objetos de longa duração saem do escopo das coletas geracionais, que
+    passam a varrer só os objetos curtos de cada lote (sem gc.collect() explícito no laço)
+    """
+    global _gc_freeze_depth
+    with _gc_freeze_lock:
+        if _gc_freeze_depth == 0:
+            gc.freeze()
+        _gc_freeze_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_freeze_lock:
+            _gc_freeze_depth -= 1
+            if _gc_freeze_depth == 0:
+                gc.unfreeze()
+
+
+def _styled_cell(ws, value=None, font=None, fill=None, alignment=None, border=None) -> WriteOnlyCell:
+    """Cria uma WriteOnlyCell com os estilos informados (workbooks são write_only: linhas via ws.append)"""
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if alignment is not None:
+        cell.alignment = alignment
+    if border is not None:
+        cell.border = border
+    return cell
+
+
+def _init_excel_worker():
+    """Initializer dos processos de geração de Excel: configura o logging uma única vez por worker"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+
+def _excel_worker(args) -> Tuple[int, bytes]:
+    """
+    Worker function for generating a single Excel file in a separate process
+    Must be at module level for multiprocessing (pickle-able)
+    """
+    file_games, file_idx, num_files, constraints_dict, budget, quantity, manual_numbers = args
+    constraints = GameConstraints(**constraints_dict)
+    # save_callback não é serializável: o salvamento incremental acontece no processo principal
+    file_bytes = ExcelGenerator()._generate_single_excel_file(
+        file_games, file_idx, num_files, constraints, budget, quantity, manual_numbers, None
+    )
+    return file_idx, file_bytes
+
 
 class ExcelGenerator:
     """Excel file generator with validation"""
     
     def __init__(self):
-        self._header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        self._header_font = Font(bold=True, color="FFFFFF")
-        self._match_fill = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
-        self._green_fill = PatternFill(start_color="92D050", end_color="92D050", fill_type="solid")
-        self._border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+        # Referências aos estilos do módulo: nenhuma instância (nem worker) aloca os seus
+        self._header_fill = _HEADER_FILL
+        self._header_font = _HEADER_FONT
+        self._match_fill = _MATCH_FILL
+        self._green_fill = _GREEN_FILL
+        self._border = _THIN_BORDER
+        self._center = _CENTER_ALIGN
+        self._bold = _BOLD_FONT
+        self._title_font = _TITLE_FONT
+        self._section_font = _SECTION_FONT
+        self._summary_font = _SUMMARY_FONT
+        self._warning_font = _WARNING_FONT
+        self._italic = _ITALIC_FONT
+        self._wrap_top = _WRAP_TOP_ALIGN
     
     def generate_excel(
         self,
-        games: Union[List[List[int]], Iterator[List[int]]],
+        games: Union[List[List[int]], Iterator[List[int]], np.ndarray],
         constraints: GameConstraints,
         budget: float,
         quantity: int,
         manual_numbers: Optional[List[int]] = None,
-        save_callback: Optional[Callable[[int, bytes, dict], None]] = None
-    ) -> Union[bytes, List[bytes]]:
+        save_callback: Optional[Callable[[int, bytes, dict], Optional[str]]] = None,
+        csv_sidecar: bool = False
+    ) -> Union[bytes, List[Union[bytes, str]], Tuple[bytes, bytes]]:
         """
         Generate Excel file(s) with validation, games, and audit sheets
         Supports both list and streaming (generator) input for memory efficiency
         Returns single file (bytes) or list of files (List[bytes]) if exceeds Excel limit
         
         Args:
-            games: List of games or generator/iterator of games
+            games: List of games, generator/iterator of games, or an int8 array of shape (N, k)
             constraints: Game generation constraints
             budget: Budget used
             quantity: Total quantity of games
             manual_numbers: Optional manual numbers for validation
+            csv_sidecar: Write the games to a companion gzipped CSV instead of the games sheet
+                (see _generate_excel_with_csv_sidecar); never splits into multiple files
             
         Returns:
             bytes: Single Excel file if quantity <= EXCEL_MAX_GAMES_PER_FILE
             List[bytes]: Multiple Excel files if quantity > EXCEL_MAX_GAMES_PER_FILE
+                (a file saved by save_callback is listed by the path the callback returned)
+            Tuple[bytes, bytes]: (xlsx, csv.gz) when csv_sidecar=True
         """
+        if csv_sidecar:
+            return self._generate_excel_with_csv_sidecar(
+                games, constraints, budget, quantity, manual_numbers
+            )
+        
         # Check if we need to split into multiple files
         if quantity > EXCEL_MAX_GAMES_PER_FILE:
             logger.info(
@@ -75,40 +538,154 @@ class ExcelGenerator:
             )
         
         # Single file generation (original logic)
-        wb = Workbook()
-        
-        # Remove default sheet
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        # Create sheets
-        self._create_validation_sheet(wb, manual_numbers, quantity)
+        return self._build_workbook_bytes(
+            games,
+            len(games) if isinstance(games, (list, np.ndarray)) else quantity,
+            constraints, budget, quantity, manual_numbers
+        )
+    
+    def _generate_excel_with_csv_sidecar(
+        self,
+        games: Union[List[List[int]], Iterator[List[int]], np.ndarray],
+        constraints: GameConstraints,
+        budget: float,
+        quantity: int,
+        manual_numbers: Optional[List[int]]
+    ) -> Tuple[bytes, bytes]:
+        """
+        Gera um .xlsx enxuto (entrada manual, cabeçalho dos jogos e auditoria) e os jogos
+        ordenados num CSV compactado (.csv.gz) à parte: sem XML/ZIP por célula, sem limite
+        de linhas do Excel e sem dividir em vários arquivos
         
-        # Check if games is a list or iterator
-        if isinstance(games, list):
-            # Traditional approach: sort all games in memory
-            self._create_games_sheet(wb, games, manual_numbers)
-        else:
-            # Streaming approach: write incrementally with chunked sorting
-            self._create_games_sheet_streaming(wb, games, manual_numbers, quantity, constraints.numbers_per_game)
+        O CSV abre no Excel, mas sem destaque de acertos; a coluna Acertos só é preenchida
+        com números manuais, e a conferência por COUNTIF da aba Entrada Manual não enxerga
+        os jogos do CSV
+        """
+        games_count = len(games) if isinstance(games, (list, np.ndarray)) else quantity
+        wb = Workbook(write_only=True)
+        self._create_validation_sheet(wb, manual_numbers, quantity, constraints.numbers_per_game)
+        
+        csv_buffer = io.BytesIO()
+        with gzip.open(
+            csv_buffer, 'wt', encoding='utf-8', newline='', compresslevel=ZIP_COMPRESS_LEVEL
+        ) as csv_file, _frozen_gc():
+            self._create_games_sheet_streaming(
+                wb, games, manual_numbers, games_count, constraints.numbers_per_game, csv_sink=csv_file
+            )
         
         self._create_audit_sheet(wb, constraints, budget, quantity)
         
-        # Save to bytes
+        xlsx_buffer = io.BytesIO()
+        wb.save(xlsx_buffer)
+        return xlsx_buffer.getvalue(), csv_buffer.getvalue()
+    
+    def generate_excel_file(
+        self,
+        games: Union[List[List[int]], Iterator[List[int]], np.ndarray],
+        constraints: GameConstraints,
+        budget: float,
+        quantity: int,
+        manual_numbers: Optional[List[int]],
+        output_path: Union[str, Path]
+    ) -> int:
+        """
+        Generate a single Excel file straight into output_path (no bytes kept in memory)
+        Returns the size of the written file
+        
+        Only for quantities that fit one file (quantity <= EXCEL_MAX_GAMES_PER_FILE)
+        """
+        if quantity > EXCEL_MAX_GAMES_PER_FILE:
+            raise ValueError(
+                f"Quantity ({quantity}) exceeds Excel limit ({EXCEL_MAX_GAMES_PER_FILE}): "
+                f"use generate_excel to split into multiple files"
+            )
+        with open(output_path, 'wb') as output:
+            self._build_workbook(
+                games,
+                len(games) if isinstance(games, (list, np.ndarray)) else quantity,
+                constraints, budget, quantity, manual_numbers,
+                output=output
+            )
+            return output.tell()
+    
+    def _build_workbook_bytes(
+        self,
+        games_iterator: Union[Iterable[List[int]], np.ndarray],
+        games_count: int,
+        constraints: GameConstraints,
+        budget: float,
+        quantity: int,
+        manual_numbers: Optional[List[int]],
+        file_info: Optional[dict] = None
+    ) -> bytes:
+        """Monta um workbook completo (validação, jogos e auditoria) em memória e retorna seus bytes"""
         buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+        self._build_workbook(
+            games_iterator, games_count, constraints, budget, quantity, manual_numbers, buffer, file_info
+        )
+        # Sem getbuffer()/exports pendentes, getvalue() entrega o próprio buffer interno do
+        # BytesIO (sem cópia)
         return buffer.getvalue()
     
+    def _build_workbook(
+        self,
+        games_iterator: Union[Iterable[List[int]], np.ndarray],
+        games_count: int,
+        constraints: GameConstraints,
+        budget: float,
+        quantity: int,
+        manual_numbers: Optional[List[int]],
+        output: IO[bytes],
+        file_info: Optional[dict] = None
+    ):
+        """
+        Monta um workbook completo (validação, jogos e auditoria) e o escreve em output
+        (BytesIO ou arquivo em disco)
+        Acima de DIRECT_XML_MIN_GAMES as linhas de jogos vão direto para XML, fora do openpyxl
+        """
+        # Write-only: linhas são serializadas conforme o append, sem manter objetos Cell em memória
+        wb = Workbook(write_only=True)
+        
+        # Create sheets
+        self._create_validation_sheet(wb, manual_numbers, quantity, constraints.numbers_per_game)
+        
+        # Large volumes: game rows are spooled as sheet XML and injected into the saved package
+        rows_spool = tempfile.TemporaryFile() if games_count > DIRECT_XML_MIN_GAMES else None
+        
+        # Streaming approach for lists and iterators alike: write incrementally with chunked sorting
+        with _frozen_gc():
+            rows_written = self._create_games_sheet_streaming(
+                wb,
+                games_iterator,
+                manual_numbers,
+                games_count,
+                constraints.numbers_per_game,
+                rows_spool
+            )
+        
+        self._create_audit_sheet(wb, constraints, budget, quantity, file_info=file_info)
+        
+        if rows_spool is None:
+            wb.save(output)
+            return
+        
+        # O pacote do openpyxl (sem as linhas de jogos) fica em memória só até a injeção
+        package = io.BytesIO()
+        wb.save(package)
+        with rows_spool:
+            self._inject_games_rows_xml(
+                package, wb["Jogos Gerados"], rows_spool, rows_written + 3, constraints.numbers_per_game, output
+            )
+    
     def _generate_multiple_excel_files(
         self,
-        games: Union[List[List[int]], Iterator[List[int]]],
+        games: Union[List[List[int]], Iterator[List[int]], np.ndarray],
         constraints: GameConstraints,
         budget: float,
         quantity: int,
         manual_numbers: Optional[List[int]] = None,
-        save_callback: Optional[Callable[[int, bytes, dict], None]] = None
-    ) -> List[bytes]:
+        save_callback: Optional[Callable[[int, bytes, dict], Optional[str]]] = None
+    ) -> List[Union[bytes, str]]:
         """
         Generate multiple Excel files when quantity exceeds Excel limit
         Each file contains up to EXCEL_MAX_GAMES_PER_FILE games
@@ -121,14 +698,23 @@ class ExcelGenerator:
         - Use streaming for large datasets
         
         Args:
-            save_callback: Optional callback(file_idx, file_bytes, file_metadata) to save file immediately
+            save_callback: Optional callback(file_idx, file_bytes, file_metadata) to save file immediately.
+                If it returns a path, that path replaces the file bytes in the returned list,
+                so saved files are not kept in memory
         """
-        # Convert iterator to list if needed (for splitting)
-        if isinstance(games, Iterator):
-            logger.info("📦 Converting iterator to list for file splitting...")
-            games = list(games)
-        
-        total_games = len(games)
+        # Split by streaming: each file's games are taken from the iterator only when that file is built,
+        # so at most one chunk per worker is held in memory instead of the whole list
+        if isinstance(games, np.ndarray):
+            # int8 (N, k): cada arquivo é uma view do array (sem cópia), ~k bytes por jogo
+            total_games = len(games)
+            file_chunks = (
+                games[start:start + EXCEL_MAX_GAMES_PER_FILE]
+                for start in range(0, total_games, EXCEL_MAX_GAMES_PER_FILE)
+            )
+        else:
+            games_iter = iter(games)
+            total_games = len(games) if isinstance(games, list) else quantity
+            file_chunks = iter(lambda: list(islice(games_iter, EXCEL_MAX_GAMES_PER_FILE)), [])
         num_files = (total_games + EXCEL_MAX_GAMES_PER_FILE - 1) // EXCEL_MAX_GAMES_PER_FILE
         
         logger.info(
@@ -154,9 +740,12 @@ class ExcelGenerator:
                 f"⚡ BIG DATA: Using Ray for parallel Excel generation: "
                 f"{num_files} files in parallel (expected speedup: ~{num_files}x)"
             )
+            # Ray precisa de todos os chunks no object store; mantê-los permite o fallback sequencial
+            all_chunks = list(file_chunks)
+            file_chunks = iter(all_chunks)
             try:
                 return self._generate_multiple_excel_files_ray(
-                    games, constraints, budget, quantity, manual_numbers, save_callback, num_files, total_games
+                    all_chunks, constraints, budget, quantity, manual_numbers, save_callback, len(all_chunks)
                 )
             except Exception as e:
                 logger.warning(
@@ -165,108 +754,47 @@ class ExcelGenerator:
                 )
                 # Fall through to sequential generation
         
+        # Sem Ray: cada arquivo é um workbook independente, então um ProcessPoolExecutor
+        # paraleliza a geração sem o custo de inicialização do cluster Ray
+        if not RAY_AVAILABLE and num_files > 1 and (os.cpu_count() or 1) > 1:
+            return self._generate_multiple_excel_files_processes(
+                file_chunks, constraints, budget, quantity, manual_numbers, save_callback, num_files
+            )
+        
         # Fallback to sequential generation
         files = []
-        for file_idx in range(num_files):
-            start_idx = file_idx * EXCEL_MAX_GAMES_PER_FILE
-            end_idx = min(start_idx + EXCEL_MAX_GAMES_PER_FILE, total_games)
-            file_games = games[start_idx:end_idx]
-            file_quantity = len(file_games)
-            
-            progress_pct = (file_idx + 1) / num_files * 100
-            logger.info(
-                f"📄 Generating file {file_idx + 1}/{num_files}: "
-                f"games {start_idx + 1}-{end_idx} ({file_quantity} games) "
-                f"({progress_pct:.1f}% of Excel generation)"
-            )
-            
-            wb = Workbook()
-            
-            # Remove default sheet
-            if 'Sheet' in wb.sheetnames:
-                wb.remove(wb['Sheet'])
-            
-            # Create sheets
-            # For multi-file, show total quantity in validation sheet
-            self._create_validation_sheet(wb, manual_numbers, quantity)
-            
-            # Create games sheet with subset of games
-            self._create_games_sheet(wb, file_games, manual_numbers)
-            
-            # Create audit sheet with file info
-            self._create_audit_sheet(
-                wb, constraints, budget, quantity,
-                file_info={
-                    "file_number": file_idx + 1,
-                    "total_files": num_files,
-                    "games_in_file": file_quantity,
-                    "start_index": start_idx + 1,
-                    "end_index": end_idx
-                }
-            )
-            
-            # Save to bytes
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-            file_bytes = buffer.getvalue()
-            files.append(file_bytes)
-            
-            logger.info(f"✅ File {file_idx + 1}/{num_files} generated ({len(file_bytes)} bytes)")
-            
-            # BIG DATA: Save file immediately if callback provided (incremental save)
-            if save_callback:
-                file_metadata = {
-                    "file_number": file_idx + 1,
-                    "total_files": num_files,
-                    "games_in_file": file_quantity,
-                    "start_index": start_idx + 1,
-                    "end_index": end_idx,
-                    "is_multi_file": True
-                }
-                try:
-                    save_callback(file_idx, file_bytes, file_metadata)
-                    logger.info(f"💾 File {file_idx + 1}/{num_files} saved incrementally to disk")
-                except Exception as e:
-                    logger.error(f"❌ Error saving file {file_idx + 1} incrementally: {e}", exc_info=True)
-                    # Continue - file is still in memory
+        for file_idx, file_games in enumerate(file_chunks):
+            files.append(self._generate_single_excel_file(
+                file_games, file_idx, num_files, constraints, budget, quantity, manual_numbers, save_callback
+            ))
         
         logger.info(f"✅ Generated {len(files)} Excel files for {total_games} games")
         return files
     
     def _generate_single_excel_file(
         self,
-        file_games: List[List[int]],
+        file_games: Union[List[List[int]], np.ndarray],
         file_idx: int,
         num_files: int,
         constraints: GameConstraints,
         budget: float,
         quantity: int,
         manual_numbers: Optional[List[int]],
-        save_callback: Optional[Callable[[int, bytes, dict], None]] = None
-    ) -> bytes:
+        save_callback: Optional[Callable[[int, bytes, dict], Optional[str]]] = None
+    ) -> Union[bytes, str]:
         """
-        Generate a single Excel file (used by Ray workers)
+        Generate a single Excel file (sequential loop, Ray and process pool workers)
         """
         file_quantity = len(file_games)
         start_idx = file_idx * EXCEL_MAX_GAMES_PER_FILE
         
         logger.info(
-            f"📄 [Ray Worker] Generating file {file_idx + 1}/{num_files}: "
+            f"📄 Generating file {file_idx + 1}/{num_files}: "
             f"{file_quantity} games"
         )
         
-        wb = Workbook()
-        
-        # Remove default sheet
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        # Create sheets
-        self._create_validation_sheet(wb, manual_numbers, quantity)
-        self._create_games_sheet(wb, file_games, manual_numbers)
-        self._create_audit_sheet(
-            wb, constraints, budget, quantity,
+        file_bytes = self._build_workbook_bytes(
+            file_games, file_quantity, constraints, budget, quantity, manual_numbers,
             file_info={
                 "file_number": file_idx + 1,
                 "total_files": num_files,
@@ -276,43 +804,172 @@ class ExcelGenerator:
             }
         )
         
-        # Save to bytes
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        file_bytes = buffer.getvalue()
-        
-        logger.info(f"✅ [Ray Worker] File {file_idx + 1}/{num_files} generated ({len(file_bytes)} bytes)")
+        logger.info(f"✅ File {file_idx + 1}/{num_files} generated ({len(file_bytes)} bytes)")
         
         # Call save callback if provided (for incremental save)
-        if save_callback:
-            file_metadata = {
-                "file_number": file_idx + 1,
-                "total_files": num_files,
-                "games_in_file": file_quantity,
-                "start_index": start_idx + 1,
-                "end_index": start_idx + file_quantity,
-                "is_multi_file": True
-            }
+        return self._store_generated_file(save_callback, file_idx, num_files, file_bytes, file_quantity)
+    
+    def _store_generated_file(
+        self,
+        save_callback: Optional[Callable[[int, bytes, dict], Optional[str]]],
+        file_idx: int,
+        num_files: int,
+        file_bytes: bytes,
+        games_in_file: int,
+        log_prefix: str = ""
+    ) -> Union[bytes, str]:
+        """
+        Entrega um arquivo gerado ao save_callback (salvamento incremental) e devolve o que
+        fica na lista de resultados: o caminho retornado pelo callback ou, sem ele, os bytes
+        """
+        if not save_callback:
+            return file_bytes
+        
+        start_idx = file_idx * EXCEL_MAX_GAMES_PER_FILE
+        file_metadata = {
+            "file_number": file_idx + 1,
+            "total_files": num_files,
+            "games_in_file": games_in_file,
+            "start_index": start_idx + 1,
+            "end_index": start_idx + games_in_file,
+            "is_multi_file": True
+        }
+        try:
+            stored_path = save_callback(file_idx, file_bytes, file_metadata)
+            logger.info(f"💾 {log_prefix}File {file_idx + 1}/{num_files} saved incrementally")
+        except Exception as e:
+            logger.error(
+                f"❌ {log_prefix}Error saving file {file_idx + 1} incrementally: {e}",
+                exc_info=True
+            )
+            # Continue - file is still in memory
+            return file_bytes
+        
+        return file_bytes if stored_path is None else stored_path
+    
+    def _generate_multiple_excel_files_processes(
+        self,
+        file_chunks: Iterator[List[List[int]]],
+        constraints: GameConstraints,
+        budget: float,
+        quantity: int,
+        manual_numbers: Optional[List[int]],
+        save_callback: Optional[Callable[[int, bytes, dict], Optional[str]]],
+        num_files: int
+    ) -> List[Union[bytes, str]]:
+        """
+        Generate multiple Excel files in parallel with a ProcessPoolExecutor (Ray-free path)
+        Chunks are consumed from the iterator as workers free up, so at most one chunk per
+        worker is in flight; save_callback runs in the main process as files complete.
+        A file whose worker fails is regenerated in the main process; if the pool itself
+        cannot start or breaks, in-flight and remaining chunks are generated in the main process.
+        """
+        constraints_dict = {
+            "numbers_per_game": constraints.numbers_per_game,
+            "max_repetition": constraints.max_repetition,
+            "fixed_numbers": constraints.fixed_numbers,
+            "seed": constraints.seed
+        }
+        max_workers = min(num_files, os.cpu_count() or 1)
+        
+        logger.info(
+            f"⚡ Starting parallel Excel generation with processes: "
+            f"{num_files} files, {max_workers} workers"
+        )
+        
+        files = {}
+        start_time = time.time()
+        
+        def collect(future: Future, file_idx: int, file_games: List[List[int]]):
             try:
-                save_callback(file_idx, file_bytes, file_metadata)
-                logger.info(f"💾 [Ray Worker] File {file_idx + 1}/{num_files} saved incrementally")
+                _, file_bytes = future.result()
             except Exception as e:
-                logger.error(f"❌ [Ray Worker] Error saving file {file_idx + 1}: {e}", exc_info=True)
+                logger.warning(
+                    f"⚠️ Processes: File {file_idx + 1} failed in worker ({e}). Generating in main process."
+                )
+                file_bytes = self._generate_single_excel_file(
+                    file_games, file_idx, num_files, constraints, budget, quantity, manual_numbers
+                )
+            elapsed = time.time() - start_time
+            logger.info(
+                f"✅ Processes: File {file_idx + 1}/{num_files} completed "
+                f"({len(files) + 1}/{num_files} done, {elapsed/60:.1f} min elapsed)"
+            )
+            
+            files[file_idx] = self._store_generated_file(
+                save_callback, file_idx, num_files, file_bytes, len(file_games), "Processes: "
+            )
+        
+        def generate_in_main_process(file_idx: int, file_games: List[List[int]]):
+            files[file_idx] = self._generate_single_excel_file(
+                file_games, file_idx, num_files, constraints, budget, quantity, manual_numbers, save_callback
+            )
+        
+        file_chunks = iter(file_chunks)
+        next_idx = 0
+        pool_broken = False
+        try:
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_excel_worker)
+        except (OSError, NotImplementedError) as e:
+            # Pool não inicia (sem semáforos / /dev/shm): tudo sai do processo principal
+            logger.warning(f"⚠️ Processes: pool unavailable ({e}). Generating files in main process.")
+            executor = None
+            pool_broken = True
+        
+        if executor is not None:
+            with executor:
+                pending = {}
+                for file_games in file_chunks:
+                    file_idx = next_idx
+                    next_idx += 1
+                    # Só o submit é protegido: erros da geração no processo principal (collect) propagam
+                    try:
+                        future = executor.submit(_excel_worker, (
+                            file_games, file_idx, num_files, constraints_dict, budget, quantity, manual_numbers
+                        ))
+                    except (BrokenProcessPool, OSError) as e:
+                        logger.warning(
+                            f"⚠️ Processes: pool broken ({e}). Generating remaining files in main process."
+                        )
+                        generate_in_main_process(file_idx, file_games)
+                        pool_broken = True
+                        break
+                    pending[future] = (file_idx, file_games)
+                    
+                    # Backpressure: só lê o próximo chunk quando há um worker livre
+                    if len(pending) >= max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future, *pending.pop(future))
+                
+                # Com o pool quebrado, future.result() falha e collect gera o arquivo no processo principal
+                for future in as_completed(list(pending)):
+                    collect(future, *pending.pop(future))
+        
+        if pool_broken:
+            # Os chunks já lidos do iterador não podem ser relidos: o restante continua dele
+            for file_games in file_chunks:
+                generate_in_main_process(next_idx, file_games)
+                next_idx += 1
+        
+        assert len(files) == next_idx, f"Generated {len(files)} of {next_idx} Excel files!"
         
-        return file_bytes
+        logger.info(
+            f"✅ Processes: All {len(files)} files generated in parallel "
+            f"({(time.time() - start_time)/60:.1f} minutes)"
+        )
+        return [files[file_idx] for file_idx in sorted(files)]
     
     def _generate_multiple_excel_files_ray(
         self,
-        games: List[List[int]],
+        games_chunks: List[List[List[int]]],
         constraints: GameConstraints,
         budget: float,
         quantity: int,
         manual_numbers: Optional[List[int]],
-        save_callback: Optional[Callable[[int, bytes, dict], None]],
-        num_files: int,
-        total_games: int
-    ) -> List[bytes]:
+        save_callback: Optional[Callable[[int, bytes, dict], Optional[str]]],
+        num_files: int
+    ) -> List[Union[bytes, str]]:
         """
         Generate multiple Excel files using Ray for parallel processing
         BIG DATA: Each file is generated in parallel by a Ray worker
@@ -329,8 +986,7 @@ class ExcelGenerator:
             constraints_dict: dict,
             budget: float,
             quantity: int,
-            manual_numbers: Optional[List[int]],
-            total_games: int
+            manual_numbers: Optional[List[int]]
         ) -> bytes:
             """Ray remote function to generate a single Excel file in parallel"""
             # Reconstruct constraints from dict (Ray serialization)
@@ -352,13 +1008,8 @@ class ExcelGenerator:
             "seed": constraints.seed
         }
         
-        # Split games into chunks for each file
-        file_chunks = []
-        for file_idx in range(num_files):
-            start_idx = file_idx * EXCEL_MAX_GAMES_PER_FILE
-            end_idx = min(start_idx + EXCEL_MAX_GAMES_PER_FILE, total_games)
-            file_games = games[start_idx:end_idx]
-            file_chunks.append((file_games, file_idx))
+        # Games already split per file by the caller (streaming split)
+        file_chunks = [(file_games, file_idx) for file_idx, file_games in enumerate(games_chunks)]
         
         logger.info(
             f"⚡ Starting parallel Excel generation with Ray: "
@@ -376,8 +1027,7 @@ class ExcelGenerator:
                 constraints_dict,
                 budget,
                 quantity,
-                manual_numbers,
-                total_games
+                manual_numbers
             )
             futures.append((file_idx, future))
         
@@ -393,69 +1043,41 @@ class ExcelGenerator:
         start_time = time.time()
         
         # Use ray.wait() to get results as they complete (better than sequential ray.get)
-        remaining_futures = {file_idx: future for file_idx, future in futures}
+        # O(1) lookup of the file index for each ready ObjectRef (no scan/__eq__ over pending refs)
+        future_to_idx = {future: file_idx for file_idx, future in futures}
+        remaining_futures = [future for _, future in futures]
         
         while remaining_futures:
-            # Wait for at least one future to complete
-            ready, not_ready = ray.wait(
-                list(remaining_futures.values()),
-                num_returns=1,
+            # Wait for at least one future to complete (up to 4 per round-trip)
+            ready, remaining_futures = ray.wait(
+                remaining_futures,
+                num_returns=min(len(remaining_futures), 4),
                 timeout=60.0  # Wait up to 60 seconds for next completion
             )
             
             # Process completed futures
             for future in ready:
-                # Find which file_idx this future belongs to
-                file_idx = None
-                for idx, fut in remaining_futures.items():
-                    if fut == future:
-                        file_idx = idx
-                        break
-                
-                if file_idx is not None:
-                    try:
-                        file_bytes = ray.get(future)
-                        files[file_idx] = file_bytes
-                        completed += 1
-                        
-                        elapsed = time.time() - start_time
-                        logger.info(
-                            f"✅ Ray: File {file_idx + 1}/{num_files} completed "
-                            f"({completed}/{num_files} done, {elapsed/60:.1f} min elapsed)"
-                        )
-                        
-                        # Call save callback if provided (for incremental save)
-                        # This happens in the main process, not in Ray workers
-                        if save_callback:
-                            file_metadata = {
-                                "file_number": file_idx + 1,
-                                "total_files": num_files,
-                                "games_in_file": len(file_chunks[file_idx][0]),
-                                "start_index": file_idx * EXCEL_MAX_GAMES_PER_FILE + 1,
-                                "end_index": min((file_idx + 1) * EXCEL_MAX_GAMES_PER_FILE, total_games),
-                                "is_multi_file": True
-                            }
-                            try:
-                                save_callback(file_idx, file_bytes, file_metadata)
-                                logger.info(
-                                    f"💾 Ray: File {file_idx + 1}/{num_files} saved incrementally"
-                                )
-                            except Exception as e:
-                                logger.error(
-                                    f"❌ Ray: Error saving file {file_idx + 1} incrementally: {e}",
-                                    exc_info=True
-                                )
-                        
-                        # Remove from remaining
-                        del remaining_futures[file_idx]
-                    except Exception as e:
-                        logger.error(
-                            f"❌ Ray: Error getting result for file {file_idx + 1}: {e}",
-                            exc_info=True
-                        )
-                        # Remove failed future
-                        if file_idx in remaining_futures:
-                            del remaining_futures[file_idx]
+                file_idx = future_to_idx[future]
+                try:
+                    file_bytes = ray.get(future)
+                    completed += 1
+                    
+                    elapsed = time.time() - start_time
+                    logger.info(
+                        f"✅ Ray: File {file_idx + 1}/{num_files} completed "
+                        f"({completed}/{num_files} done, {elapsed/60:.1f} min elapsed)"
+                    )
+                    
+                    # Call save callback if provided (for incremental save)
+                    # This happens in the main process, not in Ray workers
+                    files[file_idx] = self._store_generated_file(
+                        save_callback, file_idx, num_files, file_bytes, len(file_chunks[file_idx][0]), "Ray: "
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"❌ Ray: Error getting result for file {file_idx + 1}: {e}",
+                        exc_info=True
+                    )
         
         total_time = time.time() - start_time
         logger.info(
@@ -473,216 +1095,147 @@ class ExcelGenerator:
         
         return files
     
-    def _create_validation_sheet(self, wb: Workbook, manual_numbers: Optional[List[int]], total_games: int):
-        """Cria Aba 1: Entrada Manual + Validação"""
+    def _create_validation_sheet(
+        self,
+        wb: Workbook,
+        manual_numbers: Optional[List[int]],
+        total_games: int,
+        numbers_per_game: int = 6
+    ):
+        """
+        Cria Aba 1: Entrada Manual + Validação
+        Aba write_only: larguras, mesclagem e validação são definidas antes e as linhas escritas em ordem
+        """
         ws = wb.create_sheet("Entrada Manual", 0)
         
-        # Título
-        ws['A1'] = "Entrada Manual de Números"
-        ws['A1'].font = Font(bold=True, size=14)
-        ws.merge_cells('A1:B1')
-        
-        # Instruções
-        ws['A3'] = "Digite 6 números (1-60) abaixo:"
-        ws['A3'].font = Font(italic=True)
-        
-        # Cabeçalhos
-        headers = ["Número 1", "Número 2", "Número 3", "Número 4", "Número 5", "Número 6"]
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=5, column=col_idx, value=header)
-            cell.font = self._header_font
-            cell.fill = self._header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = self._border
-            ws.column_dimensions[get_column_letter(col_idx)].width = 15
-        
-        # Input cells with validation
-        valid_numbers = historical_data_service.get_all_numbers()
-        number_list = ",".join(map(str, valid_numbers))
-        
+        # Larguras das colunas (precisam vir antes da primeira linha em write_only)
         for col_idx in range(1, 7):
-            cell = ws.cell(row=6, column=col_idx)
-            cell.border = self._border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Validação de dados: lista suspensa com números válidos
-            dv = DataValidation(
-                type="list",
-                formula1=f'"{number_list}"',
-                allow_blank=True,
-                showErrorMessage=True,
-                errorTitle="Número Inválido",
-                error="Por favor, selecione um número entre 1 e 60 que existe nos dados históricos."
-            )
-            ws.add_data_validation(dv)
-            dv.add(cell)
-            
-            # Pré-preenchimento se números manuais fornecidos
-            if manual_numbers and col_idx <= len(manual_numbers):
-                cell.value = manual_numbers[col_idx - 1]
+            ws.column_dimensions[_COL_LETTERS[col_idx]].width = 15
+        
+        ws.merged_cells.add('A1:B1')
+        
+        # Validação de dados: uma única lista suspensa cobrindo as 6 células de entrada
+        dv = DataValidation(
+            type="list",
+            formula1=_valid_numbers_cached(historical_data_service.get_last_update_date())[1],
+            allow_blank=True,
+            showErrorMessage=True,
+            errorTitle="Número Inválido",
+            error="Por favor, selecione um número entre 1 e 60 que existe nos dados históricos."
+        )
+        dv.add("A6:F6")
+        ws.data_validations.append(dv)
+        
+        # Estilos compartilhados (imutáveis) em variáveis locais
+        center = self._center
+        border = self._border
         
-        # Validação adicional: fórmula personalizada para verificação de intervalo
+        # Linha 1: Título
+        ws.append([_styled_cell(ws, "Entrada Manual de Números", font=self._title_font)])
+        ws.append([])
+        
+        # Linha 3: Instruções
+        ws.append([_styled_cell(ws, "Digite 6 números (1-60) abaixo:", font=self._italic)])
+        ws.append([])
+        
+        # Linha 5: Cabeçalhos
+        self._register_game_styles(wb)
+        ws.append([self._game_cell(ws, header, HEADER_CELL_STYLE) for header in _games_header_labels(6)[:-1]])
+        
+        # Linha 6: células de entrada, pré-preenchidas se números manuais fornecidos
+        input_cells = []
         for col_idx in range(1, 7):
-            cell_ref = get_column_letter(col_idx) + "6"
+            value = manual_numbers[col_idx - 1] if manual_numbers and col_idx <= len(manual_numbers) else None
+            cell = _styled_cell(ws, value, alignment=center, border=border)
             # Adicionar nota
-            ws[cell_ref].comment = Comment("Digite um número entre 1 e 60", "Gerador Mega-Sena")
+            cell.comment = Comment("Digite um número entre 1 e 60", "Gerador Mega-Sena")
+            input_cells.append(cell)
+        ws.append(input_cells)
+        ws.append([])
         
         # Add summary section for counting matches
-        row = 8
-        ws[f'A{row}'] = "Resultados da Conferência:"
-        ws[f'A{row}'].font = Font(bold=True, size=12)
-        row += 1
-        
-        # Quadra (4 matches) - Count games with exactly 4 matches
-        ws[f'A{row}'] = "Quadras (4 acertos):"
-        ws[f'A{row}'].font = Font(bold=True)
-        # Fórmula: Contar linhas em Jogos Gerados onde coluna Acertos = 4
+        ws.append([_styled_cell(ws, "Resultados da Conferência:", font=self._section_font)])
+        
+        # Fórmula: Contar linhas em Jogos Gerados onde coluna Acertos = 4, 5 e 6
         last_row = 3 + total_games
-        match_col = get_column_letter(7)  # Coluna G (7ª coluna)
-        ws[f'B{row}'] = f"=COUNTIF('Jogos Gerados'!{match_col}4:{match_col}{last_row},4)"
-        ws[f'B{row}'].border = self._border
-        ws[f'B{row}'].alignment = Alignment(horizontal='center', vertical='center')
-        ws[f'B{row}'].font = Font(bold=True, size=11)
-        row += 1
-        
-        # Quina (5 matches) - Count games with exactly 5 matches
-        ws[f'A{row}'] = "Quinas (5 acertos):"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'B{row}'] = f"=COUNTIF('Jogos Gerados'!{match_col}4:{match_col}{last_row},5)"
-        ws[f'B{row}'].border = self._border
-        ws[f'B{row}'].alignment = Alignment(horizontal='center', vertical='center')
-        ws[f'B{row}'].font = Font(bold=True, size=11)
-        row += 1
-        
-        # Sena (6 matches) - Count games with exactly 6 matches
-        ws[f'A{row}'] = "Senas (6 acertos):"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'B{row}'] = f"=COUNTIF('Jogos Gerados'!{match_col}4:{match_col}{last_row},6)"
-        ws[f'B{row}'].border = self._border
-        ws[f'B{row}'].alignment = Alignment(horizontal='center', vertical='center')
-        ws[f'B{row}'].font = Font(bold=True, size=11)
-        
-        # Format column B width
-        ws.column_dimensions['B'].width = 15
-    
-    def _create_games_sheet(self, wb: Workbook, games: List[List[int]], manual_numbers: Optional[List[int]]):
-        """Cria Aba 2: Jogos Gerados com formatação condicional"""
-        ws = wb.create_sheet("Jogos Gerados", 1)
+        match_col = _COL_LETTERS[numbers_per_game + 1]  # Coluna Acertos, logo após os números do jogo
+        for label, hits in (("Quadras (4 acertos):", 4), ("Quinas (5 acertos):", 5), ("Senas (6 acertos):", 6)):
+            ws.append([
+                _styled_cell(ws, label, font=self._bold),
+                _styled_cell(
+                    ws, f"=COUNTIF('Jogos Gerados'!{match_col}4:{match_col}{last_row},{hits})",
+                    font=self._summary_font, alignment=center, border=border
+                ),
+            ])
+    
+    def _write_games_sheet_header(self, ws, total_games: int, numbers_per_game: int):
+        """
+        Escreve título (mesclado uma única vez) e cabeçalhos da aba de jogos (linhas 1-3)
+        As larguras das colunas são definidas antes, como exige o modo write_only
+        """
+        # Letras das colunas (números + Acertos) resolvidas uma vez para larguras e mesclagem
+        column_letters = _COL_LETTERS[1:numbers_per_game + 2]
+        column_dimensions = ws.column_dimensions
+        for letter in column_letters:
+            column_dimensions[letter].width = 12
+        
+        ws.merged_cells.add(f'A1:{column_letters[-2]}1')
+        ws.append([_styled_cell(ws, f"Jogos Gerados ({total_games} total)", font=self._title_font)])
+        ws.append([])
+        
+        ws.append([
+            self._game_cell(ws, header, HEADER_CELL_STYLE)
+            for header in _games_header_labels(numbers_per_game)
+        ])
+    
+    def _add_match_conditional_formatting(self, ws, start_row: int, end_row: int, numbers_per_game: int):
+        """
+        Registra a formatação condicional de acertos: uma única regra para todas as colunas de
+        números e todas as linhas de jogos (desabilitada acima de FORMATTING_MAX_ROWS jogos)
+        A referência relativa da fórmula (célula do canto superior esquerdo) se ajusta a cada célula
+        """
+        if end_row - start_row + 1 > FORMATTING_MAX_ROWS:
+            return
         
-        # Título
-        ws['A1'] = f"Jogos Gerados ({len(games)} total)"
-        ws['A1'].font = Font(bold=True, size=14)
-        ws.merge_cells(f'A1:{get_column_letter(len(games[0]) if games else 6)}1')
-        
-        # Cabeçalhos
-        headers = [f"Número {i+1}" for i in range(len(games[0]) if games else 6)]
-        headers.append("Acertos")
-        
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col_idx, value=header)
-            cell.font = self._header_font
-            cell.fill = self._header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = self._border
-            ws.column_dimensions[get_column_letter(col_idx)].width = 12
-        
-        # Sort games: ensure numbers within each game are sorted (they should already be),
-        # then sort games lexicographically by columns 1 to N
-        sorted_games = []
-        for game in games:
-            # Ensure numbers are sorted within the game
-            sorted_game = sorted(game)
-            sorted_games.append(sorted_game)
-        
-        # Sort all games lexicographically (by column 1, then column 2, etc.)
-        sorted_games.sort()
-        
-        # Games data
-        manual_set = set(manual_numbers) if manual_numbers else set()
-        
-        # Determinar se usar formatação condicional (desabilitar para volumes maiores)
-        use_conditional_formatting = len(sorted_games) <= 1000
-        start_data_row = 4
-        end_data_row = start_data_row + len(sorted_games) - 1
-        
-        # Escrever dados primeiro
-        for row_idx, game in enumerate(sorted_games, start=4):
-            # Check for matches
-            matches = manual_set & set(game) if manual_set else set()
-            has_match = len(matches) > 0
-            
-            for col_idx, number in enumerate(game, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=number)
-                cell.border = self._border
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                # Destaque direto se corresponde à entrada manual (mais eficiente)
-                if number in matches:
-                    cell.fill = self._match_fill
-                    cell.font = Font(bold=True)
-            
-            # Indicador de acertos com fórmula
-            match_col = len(game) + 1
-            match_cell = ws.cell(row=row_idx, column=match_col)
-            # Fórmula para contar acertos: Soma de COUNTIF para cada célula na linha
-            formula_parts = []
-            for col_idx in range(1, len(game) + 1):
-                col_letter = get_column_letter(col_idx)
-                formula_parts.append(f"COUNTIF('Entrada Manual'!$A$6:$F$6,{col_letter}{row_idx})")
-            match_cell.value = '=' + '+'.join(formula_parts)
-            match_cell.border = self._border
-            match_cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            if has_match:
-                match_cell.fill = self._match_fill
-                match_cell.font = Font(bold=True)
-        
-        # Adicionar formatação condicional por RANGE (muito mais eficiente)
-        if use_conditional_formatting and manual_set and sorted_games:
-            numbers_per_game = len(sorted_games[0])
-            for col_idx in range(1, numbers_per_game + 1):
-                col_letter = get_column_letter(col_idx)
-                range_ref = f'{col_letter}{start_data_row}:{col_letter}{end_data_row}'
-                
-                # Uma regra para todo o range ao invés de uma por célula
-                fill_rule = FormulaRule(
-                    formula=[f"COUNTIF('Entrada Manual'!$A$6:$F$6,{col_letter}{start_data_row})>0"],
-                    fill=self._green_fill,
-                    font=Font(bold=True)
-                )
-                ws.conditional_formatting.add(range_ref, fill_rule)
+        fill_rule = FormulaRule(
+            formula=[f"COUNTIF({_MANUAL_RANGE_REF},A{start_row})>0"],
+            fill=self._green_fill,
+            font=self._bold
+        )
+        ws.conditional_formatting.add(f'A{start_row}:{_COL_LETTERS[numbers_per_game]}{end_row}', fill_rule)
     
     def _create_games_sheet_streaming(
         self,
         wb: Workbook,
-        games_iterator: Iterator[List[int]],
+        games_iterator: Union[Iterable[List[int]], np.ndarray],
         manual_numbers: Optional[List[int]],
         total_games: int,
-        numbers_per_game: int
+        numbers_per_game: int,
+        rows_spool: Optional[IO[bytes]] = None,
+        use_conditional_formatting: bool = False,
+        csv_sink: Optional[IO[str]] = None
     ):
         """
         Cria aba de jogos usando abordagem de streaming otimizada para grandes volumes
         Processa jogos em lotes, ordena incrementalmente e escreve com buffer eficiente
         Otimizado para volumes de 1M+ jogos
+        Retorna o número de jogos escritos
+        
+        Se rows_spool for informado, as linhas de jogos não viram células do openpyxl:
+        são serializadas como XML da planilha no spool e injetadas no .xlsx após o save
+        (ver _inject_games_rows_xml)
+        
+        Os acertos já saem destacados direto nas células (fill/fonte) a partir dos números manuais
+        informados na geração. A formatação condicional (que reavalia COUNTIF na aba Entrada Manual
+        e acompanha edições feitas pelo usuário) é opcional: use_conditional_formatting=True
+        
+        Se csv_sink for informado, a aba fica só com título/cabeçalho e uma nota, e os jogos
+        ordenados vão como linhas CSV (números + acertos) para o arquivo texto informado
         """
         ws = wb.create_sheet("Jogos Gerados", 1)
+        self._register_game_styles(wb)
         
-        # Título
-        ws['A1'] = f"Jogos Gerados ({total_games} total)"
-        ws['A1'].font = Font(bold=True, size=14)
-        ws.merge_cells(f'A1:{get_column_letter(numbers_per_game)}1')
-        
-        # Cabeçalhos
-        headers = [f"Número {i+1}" for i in range(numbers_per_game)]
-        headers.append("Acertos")
-        
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col_idx, value=header)
-            cell.font = self._header_font
-            cell.fill = self._header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = self._border
-            ws.column_dimensions[get_column_letter(col_idx)].width = 12
+        self._write_games_sheet_header(ws, total_games, numbers_per_game)
         
         # Buffer otimizado para grandes volumes
         # Para 1M+ jogos: usar chunks menores e escrever mais frequentemente
@@ -696,250 +1249,305 @@ class ExcelGenerator:
             sort_chunk_size = 5_000
             write_buffer_size = 10_000
         
-        # Usar heap merge para ordenação incremental (mais eficiente em memória)
-        from heapq import heappush, heappop
-        
-        # Buffer para jogos ordenados (mantém apenas o necessário)
-        sorted_buffer = []
-        current_chunk = []
+        # Chunks ordenados individualmente; a ordem global sai de um k-way merge (heapq.merge)
+        # ao final, em O(N log k) ao invés de reordenar o buffer inteiro a cada chunk.
+        # Em grandes volumes cada chunk ordenado é despejado em disco (external merge sort)
+        sorted_chunks = _SortedRuns(spill=total_games > DIRECT_XML_MIN_GAMES)
         games_processed = 0
         rows_written = 0
         
-        manual_set = set(manual_numbers) if manual_numbers else set()
+        manual_mask = _manual_bitmap(manual_numbers)
+        xml_style_ids = self._register_xml_cell_styles(ws) if rows_spool is not None else None
         
         logger.info(
             f"Processando {total_games} jogos em modo streaming otimizado "
             f"(sort chunk: {sort_chunk_size}, write buffer: {write_buffer_size})"
         )
         
-        def write_batch(games_batch: List[List[int]], start_row: int):
-            """Helper para escrever um batch de jogos"""
-            self._write_games_to_sheet_batch(
-                ws, games_batch, start_row, manual_set, numbers_per_game
-            )
-        
-        # Coletar e processar jogos em lotes
-        for game in games_iterator:
-            # Garantir que números estão ordenados dentro do jogo
-            sorted_game = sorted(game)
-            current_chunk.append(sorted_game)
-            games_processed += 1
-            
-            # Quando o chunk está cheio, ordenar e adicionar ao buffer
-            if len(current_chunk) >= sort_chunk_size:
-                current_chunk.sort()  # Ordenar lexicograficamente
-                
-                # Adicionar ao buffer ordenado (usando heap para merge eficiente)
-                sorted_buffer.extend(current_chunk)
-                sorted_buffer.sort()  # Manter ordenado
-                current_chunk = []  # Clear immediately to free memory
-                
-                # CRITICAL: Write when buffer reaches limit to prevent memory growth
-                # For very large volumes, write more frequently
-                if len(sorted_buffer) >= write_buffer_size:
-                    batch_to_write = sorted_buffer[:write_buffer_size]
-                    batch_start_row = rows_written + 4
-                    batch_end_row = batch_start_row + len(batch_to_write) - 1
-                    
-                    # Check Excel row limit before writing
-                    if batch_end_row > EXCEL_MAX_ROWS:
-                        raise ValueError(
-                            f"Cannot write batch to row {batch_end_row}: Excel row limit is {EXCEL_MAX_ROWS}. "
-                            f"Total games would be {rows_written + len(batch_to_write)}, but Excel supports max {EXCEL_MAX_GAMES_PER_FILE} games per file. "
-                            f"Use _generate_multiple_excel_files instead."
-                        )
-                    
-                    write_batch(batch_to_write, batch_start_row)
-                    rows_written += write_buffer_size
-                    # CRITICAL: Use slice assignment to free memory immediately
-                    sorted_buffer = sorted_buffer[write_buffer_size:]
-                    
-                    # Force garbage collection for very large volumes
-                    if total_games > 1_000_000 and rows_written % 200_000 == 0:
-                        import gc
-                        gc.collect()
+        # Jogos empacotados em inteiros: sort e merge comparam um int ao invés de uma lista
+        pack_games = numbers_per_game <= _PACK_MAX_NUMBERS
+        sort_chunk = _pack_games_chunk if pack_games else _sort_games_chunk
+        
+        # Coletar jogos e ordenar cada chunk assim que fica cheio
+        # O sort de cada chunk roda numa thread do pool (o NumPy libera o GIL durante o sort),
+        # em paralelo com a geração dos próximos jogos na thread principal.
+        # Sorts já enviados são recolhidos em ordem (FIFO) para que poucos runs fiquem em memória
+        sort_futures: Deque[Future] = deque()
+        max_pending_sorts = 2 * SORT_WORKERS
+        
+        def submit_sort(chunk):
+            sort_futures.append(sort_executor.submit(sorted_chunks.sort_and_store, sort_chunk, chunk))
+            while len(sort_futures) > max_pending_sorts:
+                sorted_chunks.add(sort_futures.popleft().result())
+        
+        with ThreadPoolExecutor(max_workers=SORT_WORKERS, thread_name_prefix="excel-sort") as sort_executor:
+            # Um único fluxo: chunk -> sort (pool) -> runs -> merge em lotes -> escrita,
+            # sem buffer de jogos mantido como estado entre as etapas
+            for chunk in _game_chunks(games_iterator, sort_chunk_size):
+                submit_sort(chunk)
+                games_processed += len(chunk)
                 
                 # Log progresso
                 if games_processed % 100_000 == 0:
                     logger.info(
                         f"Processado: {games_processed}/{total_games} jogos "
-                        f"({rows_written} escritos, {len(sorted_buffer)} no buffer)"
+                        f"({len(sorted_chunks) + len(sort_futures)} chunks enviados para ordenação)"
                     )
+            
+            # A ordem dos chunks não importa para o merge
+            while sort_futures:
+                sorted_chunks.add(sort_futures.popleft().result())
+        
+        logger.info(f"Mesclando {len(sorted_chunks)} chunks ordenados e escrevendo {games_processed} jogos...")
         
-        # Processar chunk restante
-        if current_chunk:
-            current_chunk.sort()
-            sorted_buffer.extend(current_chunk)
-            sorted_buffer.sort()
-        
-        # Escrever buffer final
-        if sorted_buffer:
-            logger.info(f"Escrevendo buffer final: {len(sorted_buffer)} jogos...")
-            final_start_row = rows_written + 4
-            final_end_row = final_start_row + len(sorted_buffer) - 1
+        # Merge em streaming, já em lotes de write_buffer_size: sem buffer intermediário sendo
+        # copiado ou fatiado a cada flush (jogos empacotados são mesclados em blocos no NumPy)
+        merged_batches = sorted_chunks.merged_batches(write_buffer_size)
+        
+        if csv_sink is not None:
+            rows_written = self._write_games_csv(
+                csv_sink, merged_batches, pack_games, manual_mask, numbers_per_game
+            )
+            ws.append([_styled_cell(
+                ws, f"Os {rows_written} jogos estão no arquivo CSV que acompanha esta planilha",
+                font=self._italic
+            )])
+            sorted_chunks.close()
+            logger.info(f"Sucesso: {games_processed} jogos processados, {rows_written} escritos no CSV")
+            return rows_written
+        
+        # Escrita inline (sem closure/método por lote) com lookups do laço quente em variáveis locais
+        append_row = ws.append
+        formula_tmpl = _match_formula_template(numbers_per_game)
+        if rows_spool is None:
+            # Em write_only cada célula é serializada assim que o append a consome: uma célula
+            # pré-estilizada por número (1-60) é reaproveitada em todas as linhas. O destaque depende
+            # só do número, então a tabela já resolve "é número manual?" sem teste por célula
+            is_manual = _manual_lookup(manual_mask)
+            number_cells = [None] + [
+                self._game_cell(ws, number, GAME_CELL_MATCH_STYLE if is_manual[number] else GAME_CELL_STYLE)
+                for number in range(1, 61)
+            ]
+            # Acertos: com entrada manual, o total já calculado (inteiro) em células por contagem;
+            # sem entrada manual, a fórmula continua conferindo o que o usuário digitar na aba 1
+            count_cells = [
+                self._game_cell(ws, count, GAME_CELL_MATCH_STYLE if count else GAME_CELL_STYLE)
+                for count in range(numbers_per_game + 1)
+            ]
+            formula_cell = self._game_cell(ws, None, GAME_CELL_STYLE)
+            emit_row = _game_row_emitter(numbers_per_game)
+        
+        for batch in merged_batches:
+            if pack_games:
+                # O XML direto serializa a partir do array (N, k); as células do openpyxl, de listas
+                batch = (_unpack_games_array if rows_spool is not None else _unpack_games)(batch, numbers_per_game)
+            
+            start_row = rows_written + 4
+            end_row = start_row + len(batch) - 1
             
             # Check Excel row limit before writing
-            if final_end_row > EXCEL_MAX_ROWS:
+            if end_row > EXCEL_MAX_ROWS:
                 raise ValueError(
-                    f"Cannot write final buffer to row {final_end_row}: Excel row limit is {EXCEL_MAX_ROWS}. "
-                    f"Total games would be {rows_written + len(sorted_buffer)}, but Excel supports max {EXCEL_MAX_GAMES_PER_FILE} games per file. "
+                    f"Cannot write batch to row {end_row}: Excel row limit is {EXCEL_MAX_ROWS}. "
+                    f"Total games would be {rows_written + len(batch)}, but Excel supports max {EXCEL_MAX_GAMES_PER_FILE} games per file. "
                     f"Use _generate_multiple_excel_files instead."
                 )
             
-            write_batch(sorted_buffer, final_start_row)
-            rows_written += len(sorted_buffer)
-            sorted_buffer.clear()  # Clear to free memory
+            if rows_spool is not None:
+                # Todos os lotes anteriores são cheios: rows_written // write_buffer_size é o índice do lote
+                rows_spool.write(self._games_batch_to_xml(
+                    batch, start_row, manual_mask, numbers_per_game, xml_style_ids,
+                    rows_written // write_buffer_size
+                ))
+            else:
+                if manual_mask:
+                    # Acertos calculados de uma vez para o lote inteiro (NumPy)
+                    for game, match_count in zip(batch, _compute_match_counts(batch, manual_mask)):
+                        append_row(emit_row(game, number_cells, count_cells[match_count]))
+                else:
+                    for row_idx, game in enumerate(batch, start=start_row):
+                        # Indicador de acertos com fórmula
+                        formula_cell.value = formula_tmpl % (row_idx, row_idx)
+                        append_row(emit_row(game, number_cells, formula_cell))
+            
+            rows_written += len(batch)
+        
+        sorted_chunks.close()  # Liberar memória/arquivo dos chunks já escritos
         
-        # Final cleanup
-        current_chunk.clear()
-        import gc
-        gc.collect()
+        # Formatação condicional (opcional) registrada uma vez para a aba inteira (não por lote)
+        if use_conditional_formatting and manual_mask and rows_written and rows_spool is None:
+            self._add_match_conditional_formatting(ws, 4, 3 + rows_written, numbers_per_game)
         
         logger.info(f"Sucesso: {games_processed} jogos processados, {rows_written} escritos no Excel")
+        return rows_written
     
-    def _write_games_to_sheet(
+    def _write_games_csv(
         self,
-        ws,
-        games: List[List[int]],
-        start_row: int,
-        manual_set: set,
+        csv_sink: IO[str],
+        merged_batches: Iterator,
+        pack_games: bool,
+        manual_mask: int,
         numbers_per_game: int
-    ):
+    ) -> int:
+        """Escreve cabeçalho e jogos ordenados (números + acertos) como CSV, em lotes"""
+        writer = csv.writer(csv_sink, lineterminator='\n')
+        writer.writerow(_games_header_labels(numbers_per_game))
+        
+        rows_written = 0
+        for batch in merged_batches:
+            if pack_games:
+                batch = _unpack_games(batch, numbers_per_game)
+            
+            if manual_mask:
+                for game, match_count in zip(batch, _compute_match_counts(batch, manual_mask)):
+                    game.append(match_count)
+            else:
+                # Sem entrada manual não há acertos a calcular (e fórmulas não existem em CSV)
+                for game in batch:
+                    game.append('')
+            writer.writerows(batch)
+            rows_written += len(batch)
+        
+        return rows_written
+    
+    def _register_game_styles(self, wb: Workbook):
         """
-        Escreve jogos na planilha de forma eficiente
-        Usado para escrita incremental em grandes volumes
-        OTIMIZADO: Usa formatação por range ao invés de célula por célula
+        Registra no workbook (uma vez) os estilos nomeados das células de jogos e dos cabeçalhos
+        Cada célula recebe o estilo por nome, ao invés de atribuir borda/alinhamento/fill/fonte um a um
         """
-        if not games:
+        if GAME_CELL_STYLE in wb.named_styles:
             return
+        # NamedStyle fica vinculado ao workbook em que é registrado: criar novos a cada workbook
+        wb.add_named_style(NamedStyle(
+            name=GAME_CELL_STYLE,
+            border=self._border,
+            alignment=self._center
+        ))
+        wb.add_named_style(NamedStyle(
+            name=GAME_CELL_MATCH_STYLE,
+            border=self._border,
+            alignment=self._center,
+            fill=self._match_fill,
+            font=self._bold
+        ))
+        wb.add_named_style(NamedStyle(
+            name=HEADER_CELL_STYLE,
+            border=self._border,
+            alignment=self._center,
+            fill=self._header_fill,
+            font=self._header_font
+        ))
+    
+    def _game_cell(self, ws, value, style_name: str) -> WriteOnlyCell:
+        """Célula write_only de jogo com o estilo nomeado informado"""
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style_name
+        return cell
+    
+    def _register_xml_cell_styles(self, ws) -> Tuple[int, int]:
+        """
+        Registra no workbook os estilos das células de jogos e retorna seus índices (normal, destaque)
+        Usado pela escrita direta em XML, que referencia os estilos apenas pelo índice s="N"
+        """
+        self._register_game_styles(ws.parent)
         
-        end_row = start_row + len(games) - 1
+        normal_cell = WriteOnlyCell(ws)
+        normal_cell.style = GAME_CELL_STYLE
         
-        # Para volumes maiores, desabilitar formatação condicional (muito pesado)
-        use_conditional_formatting = len(games) <= 1000
+        match_cell = WriteOnlyCell(ws)
+        match_cell.style = GAME_CELL_MATCH_STYLE
         
-        # Escrever dados primeiro
-        for idx, game in enumerate(games):
-            row_idx = start_row + idx
-            # Verificar correspondências
-            matches = manual_set & set(game) if manual_set else set()
-            
-            for col_idx, number in enumerate(game, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=number)
-                cell.border = self._border
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                # Destaque direto se corresponde à entrada manual (mais eficiente)
-                if number in matches:
-                    cell.fill = self._match_fill
-                    cell.font = Font(bold=True)
-            
-            # Indicador de acertos com fórmula
-            match_col = len(game) + 1
-            match_cell = ws.cell(row=row_idx, column=match_col)
-            # Construir fórmula: =COUNTIF('Entrada Manual'!$A$6:$F$6,A4)+COUNTIF('Entrada Manual'!$A$6:$F$6,B4)+...
-            formula_parts = []
-            for col_idx in range(1, len(game) + 1):
-                col_letter = get_column_letter(col_idx)
-                formula_parts.append(f"COUNTIF('Entrada Manual'!$A$6:$F$6,{col_letter}{row_idx})")
-            match_cell.value = '=' + '+'.join(formula_parts)
-            match_cell.border = self._border
-            match_cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            if matches:
-                match_cell.fill = self._match_fill
-                match_cell.font = Font(bold=True)
-        
-        # Adicionar formatação condicional por RANGE (muito mais eficiente)
-        if use_conditional_formatting and manual_set:
-            for col_idx in range(1, numbers_per_game + 1):
-                col_letter = get_column_letter(col_idx)
-                range_ref = f'{col_letter}{start_row}:{col_letter}{end_row}'
-                
-                # Uma regra para todo o range ao invés de uma por célula
-                fill_rule = FormulaRule(
-                    formula=[f"COUNTIF('Entrada Manual'!$A$6:$F$6,{col_letter}{start_row})>0"],
-                    fill=self._green_fill,
-                    font=Font(bold=True)
-                )
-                ws.conditional_formatting.add(range_ref, fill_rule)
+        return normal_cell.style_id, match_cell.style_id
     
-    def _write_games_to_sheet_batch(
+    def _games_batch_to_xml(
         self,
-        ws,
-        games: List[List[int]],
+        games: Union[List[List[int]], np.ndarray],
         start_row: int,
-        manual_set: set,
-        numbers_per_game: int
-    ):
-        """
-        Escreve jogos em batch otimizado para grandes volumes
-        Usa escrita em lote e formatação por range para melhor performance
+        manual_mask: int,
+        numbers_per_game: int,
+        style_ids: Tuple[int, int],
+        shared_formula_index: int = 0
+    ) -> bytes:
         """
-        if not games:
-            return
-        
-        end_row = start_row + len(games) - 1
+        Serializa um lote de jogos como elementos <row> da aba Jogos Gerados
+        Mesmo conteúdo das células escritas em _create_games_sheet_streaming, sem criar objetos Cell
+        Sem números manuais, o lote forma um grupo de fórmula compartilhada (shared_formula_index único por lote)
         
-        # Check Excel row limit
-        if end_row > EXCEL_MAX_ROWS:
-            raise ValueError(
-                f"Cannot write games to row {end_row}: Excel row limit is {EXCEL_MAX_ROWS}. "
-                f"This should not happen if _generate_multiple_excel_files is used correctly."
+        Os fragmentos de XML são montados numa matriz de objetos (uma linha por jogo) via indexação
+        NumPy nas tabelas de células, e unidos num único join: sem laço Python por célula
+        """
+        normal_style_id, match_style_id = style_ids
+        games_arr = _games_array(games, np.intp) if len(games) else np.empty((0, numbers_per_game), np.intp)
+        rows_count = len(games_arr)
+        
+        # Célula de cada número pré-serializada por tabela (destaque = número da entrada manual).
+        # Sem atributo r: as células de uma linha são sequenciais a partir da coluna A
+        number_cells, count_cells = _xml_game_cells(manual_mask, numbers_per_game, normal_style_id, match_style_id)
+        
+        fragments = np.empty((rows_count, numbers_per_game + 3), dtype=object)
+        fragments[:, 0] = [f'<row r="{row_idx}">' for row_idx in range(start_row, start_row + rows_count)]
+        fragments[:, 1:numbers_per_game + 1] = number_cells[games_arr]
+        fragments[:, -1] = '</row>'
+        
+        if manual_mask:
+            # Acertos já calculados: valor inteiro, sem fórmula para o Excel recalcular
+            fragments[:, -2] = count_cells[_match_counts_array(games_arr, manual_mask)]
+        elif rows_count:
+            # Fórmula compartilhada (shared formula): o texto vai só na primeira linha do lote e as
+            # demais apenas referenciam o grupo (si), com o Excel ajustando a linha de cada uma
+            match_letter = _COL_LETTERS[numbers_per_game + 1]
+            end_row = start_row + rows_count - 1
+            master_formula = _match_formula_template(numbers_per_game)[1:] % (start_row, start_row)  # sem '='
+            fragments[:, -2] = [
+                f'<c r="{match_letter}{row_idx}" s="{normal_style_id}"><f t="shared" si="{shared_formula_index}"/></c>'
+                for row_idx in range(start_row, end_row + 1)
+            ]
+            fragments[0, -2] = (
+                f'<c r="{match_letter}{start_row}" s="{normal_style_id}">'
+                f'<f t="shared" ref="{match_letter}{start_row}:{match_letter}{end_row}" si="{shared_formula_index}">'
+                f'{master_formula}</f></c>'
             )
         
-        # Para volumes maiores, desabilitar formatação condicional (muito pesado)
-        use_conditional_formatting = len(games) <= 1000
-        
-        # Agrupar operações similares
-        manual_set_frozen = frozenset(manual_set) if manual_set else frozenset()
-        
-        # Escrever dados primeiro
-        for idx, game in enumerate(games):
-            row_idx = start_row + idx
-            game_set = set(game)
-            matches = manual_set_frozen & game_set if manual_set_frozen else set()
-            
-            # Escrever números do jogo
-            for col_idx, number in enumerate(game, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=number)
-                cell.border = self._border
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                # Destaque direto se corresponde à entrada manual (mais eficiente)
-                if number in matches:
-                    cell.fill = self._match_fill
-                    cell.font = Font(bold=True)
-            
-            # Indicador de acertos com fórmula
-            match_col = len(game) + 1
-            match_cell = ws.cell(row=row_idx, column=match_col)
-            # Construir fórmula de forma otimizada
-            formula_parts = []
-            for col_idx in range(1, len(game) + 1):
-                col_letter = get_column_letter(col_idx)
-                formula_parts.append(f"COUNTIF('Entrada Manual'!$A$6:$F$6,{col_letter}{row_idx})")
-            match_cell.value = '=' + '+'.join(formula_parts)
-            match_cell.border = self._border
-            match_cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            if matches:
-                match_cell.fill = self._match_fill
-                match_cell.font = Font(bold=True)
-        
-        # Adicionar formatação condicional por RANGE (muito mais eficiente)
-        if use_conditional_formatting and manual_set:
-            for col_idx in range(1, numbers_per_game + 1):
-                col_letter = get_column_letter(col_idx)
-                range_ref = f'{col_letter}{start_row}:{col_letter}{end_row}'
+        return ''.join(fragments.ravel().tolist()).encode('utf-8')
+    
+    def _inject_games_rows_xml(
+        self,
+        xlsx_buffer: io.BytesIO,
+        ws,
+        rows_spool: IO[bytes],
+        last_row: int,
+        numbers_per_game: int,
+        output: Optional[IO[bytes]] = None
+    ) -> IO[bytes]:
+        """
+        Copia o pacote .xlsx salvo pelo openpyxl para output (novo BytesIO se omitido), inserindo
+        as linhas spooladas no final do <sheetData> da aba de jogos (título e cabeçalhos já estão lá)
+        """
+        sheet_part = ws.path.lstrip('/')
+        rows_spool.seek(0)
+        
+        if output is None:
+            output = io.BytesIO()
+        with zipfile.ZipFile(xlsx_buffer) as source, zipfile.ZipFile(
+            output, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESS_LEVEL
+        ) as target:
+            for item in source.infolist():
+                if item.filename != sheet_part:
+                    target.writestr(item, source.read(item.filename))
+                    continue
                 
-                # Uma regra para todo o range ao invés de uma por célula
-                fill_rule = FormulaRule(
-                    formula=[f"COUNTIF('Entrada Manual'!$A$6:$F$6,{col_letter}{start_row})>0"],
-                    fill=self._green_fill,
-                    font=Font(bold=True)
-                )
-                ws.conditional_formatting.add(range_ref, fill_rule)
+                sheet_xml = source.read(item.filename)
+                head, tail = sheet_xml.split(b'</sheetData>', 1)
+                # Atualizar a dimensão declarada da aba para incluir as linhas injetadas
+                dimension = f'<dimension ref="A1:{_COL_LETTERS[numbers_per_game + 1]}{last_row}"'.encode()
+                head = re.sub(rb'<dimension ref="[^"]*"', dimension, head, count=1)
+                with target.open(sheet_part, 'w', force_zip64=True) as member:
+                    member.write(head)
+                    shutil.copyfileobj(rows_spool, member, 1 << 20)
+                    member.write(b'</sheetData>')
+                    member.write(tail)
+        
+        return output
     
     def _create_audit_sheet(
         self,
@@ -949,20 +1557,21 @@ class ExcelGenerator:
         quantity: int,
         file_info: Optional[dict] = None
     ):
-        """Cria Aba 3: Regras e Resumo (Auditoria)"""
+        """Cria Aba 3: Regras e Resumo (Auditoria), escrita linha a linha (write_only)"""
         ws = wb.create_sheet("Regras e Resumo", 2)
         
-        # Título
-        ws['A1'] = "Parâmetros de Geração e Auditoria"
-        ws['A1'].font = Font(bold=True, size=14)
-        ws.merge_cells('A1:B1')
+        # Formatar colunas (antes da primeira linha em write_only)
+        ws.column_dimensions['A'].width = 25
+        ws.column_dimensions['B'].width = 30
         
-        row = 3
+        # Título
+        ws.merged_cells.add('A1:B1')
+        ws.append([_styled_cell(ws, "Parâmetros de Geração e Auditoria", font=self._title_font)])
+        ws.append([])
         
         # Seção de parâmetros
-        ws[f'A{row}'] = "Parâmetros de Geração"
-        ws[f'A{row}'].font = Font(bold=True, size=12)
-        row += 2
+        ws.append([_styled_cell(ws, "Parâmetros de Geração", font=self._section_font)])
+        ws.append([])
         
         params = [
             ("Orçamento (R$)", f"R$ {budget:.2f}"),
@@ -979,30 +1588,29 @@ class ExcelGenerator:
             params.insert(3, ("Jogos neste arquivo", f"{file_info['games_in_file']} (jogos {file_info['start_index']}-{file_info['end_index']})"))
         
         for param_name, param_value in params:
-            ws[f'A{row}'] = param_name
-            ws[f'A{row}'].font = Font(bold=True)
-            ws[f'B{row}'] = param_value
-            ws[f'B{row}'].border = self._border
-            row += 1
+            ws.append([
+                _styled_cell(ws, param_name, font=self._bold),
+                _styled_cell(ws, param_value, border=self._border),
+            ])
         
-        row += 2
+        ws.append([])
+        ws.append([])
         
         # Informações de dados históricos
         last_update = historical_data_service.get_last_update_date()
-        ws[f'A{row}'] = "Dados Históricos"
-        ws[f'A{row}'].font = Font(bold=True, size=12)
-        row += 2
+        ws.append([_styled_cell(ws, "Dados Históricos", font=self._section_font)])
+        ws.append([])
         
-        ws[f'A{row}'] = "Última Atualização"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'B{row}'] = last_update.strftime("%Y-%m-%d %H:%M:%S") if last_update else "N/A"
-        ws[f'B{row}'].border = self._border
-        row += 2
+        ws.append([
+            _styled_cell(ws, "Última Atualização", font=self._bold),
+            _styled_cell(
+                ws, last_update.strftime("%Y-%m-%d %H:%M:%S") if last_update else "N/A", border=self._border
+            ),
+        ])
+        ws.append([])
         
         # Aviso
-        ws[f'A{row}'] = "AVISO IMPORTANTE"
-        ws[f'A{row}'].font = Font(bold=True, size=12, color="FF0000")
-        row += 1
+        ws.append([_styled_cell(ws, "AVISO IMPORTANTE", font=self._warning_font)])
         
         disclaimer = (
             "Este sistema não aumenta a probabilidade de ganhar. "
@@ -1011,13 +1619,10 @@ class ExcelGenerator:
             "Use esta ferramenta apenas para fins de entretenimento e organização."
         )
         
-        ws[f'A{row}'] = disclaimer
-        ws[f'A{row}'].font = Font(italic=True)
-        ws[f'A{row}'].alignment = Alignment(wrap_text=True, vertical='top')
-        ws.merge_cells(f'A{row}:B{row+2}')
+        # Linha do aviso: as linhas escritas acima ocupam 11 + len(params) linhas
+        row = 12 + len(params)
+        ws.merged_cells.add(f'A{row}:B{row+2}')
         ws.row_dimensions[row].height = 60
-        
-        # Formatar colunas
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 30
-
+        ws.append([
+            _styled_cell(ws, disclaimer, font=self._italic, alignment=self._wrap_top)
+        ])
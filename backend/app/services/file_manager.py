@@ -4,104 +4,388 @@ Manages files on disk and provides metadata
 """
 import os
 import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import BinaryIO, Callable, List, Dict, Optional, Tuple, Union
 from datetime import datetime
 import logging
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# orjson é opcional: mesma saída (UTF-8, sem escapes ASCII), com encode/decode bem mais rápidos
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_line(record: Dict) -> bytes:
+    """Registro do índice serializado numa linha (JSON Lines, UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+def _json_document(data: Dict) -> bytes:
+    """Metadata de um arquivo serializado com indentação de 2 espaços (UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    """Desserializa JSON em bytes (erros de ambos os backends são ValueError)"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _is_part_id(process_id: str) -> bool:
+    """Partes de um resultado multi-arquivo são salvas como "{process_id}-part{N}" (ver job_processor)"""
+    main_id, separator, part_number = process_id.rpartition('-part')
+    return bool(separator and main_id) and part_number.isdigit()
+
+
+# Tamanho de um registro do índice (file_size está presente em todos)
+_get_file_size = itemgetter('file_size')
+
+
+# O_BINARY só existe (e só é necessário) no Windows
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _write_bytes(path, data: bytes):
+    """Grava o conteúdo inteiro com os.open/os.write: sem o buffer do file object, um write por chamada"""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+# Use absolute path from backend directory (resolvido uma vez, no import)
+DEFAULT_BASE_DIR = Path(__file__).parent.parent.parent
+
+# Arquivos de contador ("{process_id}-counter.json") dividem o diretório de metadata, mas não são arquivos salvos
+COUNTER_FILE_SUFFIX = "-counter.json"
+
+# Reconstrução do índice: a partir de quantos arquivos de metadata o parse usa threads, e quantas
+INDEX_REBUILD_PARALLEL_MIN_FILES = 32
+INDEX_REBUILD_WORKERS = 8
+
+# Bloco da cópia de file objects em save_file
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+# Índice append-only (JSON Lines) com o metadata de todos os arquivos salvos: listagem e contagem
+# leem só este arquivo, ao invés de abrir cada .json do diretório de metadata
+INDEX_FILENAME = "_index.jsonl"
+
+# Linhas de remoção (tombstones) acumuladas antes de reescrever o índice só com os registros vivos
+INDEX_COMPACT_MIN_TOMBSTONES = 100
+
 
 class FileManager:
     """Manages saved Excel files and their metadata"""
     
-    def __init__(self):
-        # Use absolute path from backend directory
-        base_dir = Path(__file__).parent.parent.parent
+    def __init__(self, base_dir: Optional[Path] = None):
+        base_dir = base_dir or DEFAULT_BASE_DIR
         self._storage_dir = base_dir / "storage" / "excel_files"
         self._metadata_dir = base_dir / "storage" / "metadata"
         self._storage_dir.mkdir(parents=True, exist_ok=True)
         self._metadata_dir.mkdir(parents=True, exist_ok=True)
+        self._index_path = self._metadata_dir / INDEX_FILENAME
+        # Caminhos dos diretórios já em str: caminhos de arquivo montados por f-string, sem Path por chamada
+        self._storage_dir_str = str(self._storage_dir)
+        self._metadata_dir_str = str(self._metadata_dir)
+        # Saves chegam das threads de geração e deletes da API: escrita no índice serializada.
+        # RLock: a remoção relê o índice (para compactar) sem soltar o lock.
+        # Os caches (listagem e metadata) são chaveados por mtime + tamanho do arquivo de origem:
+        # um valor calculado de uma versão antiga nunca é servido depois de uma escrita
+        self._lock = threading.RLock()
+        # Registros não vivos no índice (None = ainda não lido): decide a compactação sem reler o índice
+        self._index_dead_records: Optional[int] = None
+        # Última leitura do índice: (inode, offset lido, linhas lidas, entradas vivas)
+        self._index_state: Optional[Tuple[int, int, int, Dict[str, Dict]]] = None
+        # Listagem montada do índice, com a chave (mtime_ns, tamanho) do índice lido
+        self._list_cache: Optional[Tuple[Tuple[int, int], List[Dict]]] = None
+        # Metadata por process_id já lido, com a chave (mtime_ns, tamanho) do .json de origem
+        self._metadata_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+    
+    def _append_index(self, line: bytes):
+        """Acrescenta ao índice um registro já serializado por _json_line"""
+        self._list_cache = None
+        with self._lock:
+            with self._open_index('ab') as f:
+                f.write(line)
+    
+    def _open_index(self, mode: str) -> BinaryIO:
+        """
+        Abre o índice ('rb' ou 'ab'); se ele ainda não existe, reconstrói a partir dos .json antes.
+        Sem exists() antes de cada abertura: a falta do arquivo aparece no próprio open (chamar com o lock)
+        """
+        # O_APPEND sem O_CREAT: um índice ausente falha no open ao invés de nascer vazio
+        flags = (os.O_WRONLY | os.O_APPEND if mode == 'ab' else os.O_RDONLY) | getattr(os, "O_BINARY", 0)
+        try:
+            fd = os.open(self._index_path, flags)
+        except FileNotFoundError:
+            self._rebuild_index()
+            fd = os.open(self._index_path, flags)
+        return os.fdopen(fd, mode)
+    
+    def _rebuild_index(self):
+        """
+        Reconstrói o índice a partir dos arquivos .json de metadata (migração de storages antigos)
+        Arquivos de contador ficam de fora: pelo nome, sem abri-los, e pela falta de file_path
+        """
+        # scandir: o tipo de cada entrada vem da própria listagem do diretório, sem stat por arquivo
+        with os.scandir(self._metadata_dir) as entries:
+            metadata_paths = [
+                entry.path for entry in entries
+                if entry.name.endswith(".json") and not entry.name.endswith(COUNTER_FILE_SUFFIX)
+                and entry.is_file(follow_symlinks=False)
+            ]
+        
+        # Storage frio com muitos arquivos: leitura + parse em threads (o read libera o GIL e o
+        # orjson faz o parse em C), na mesma ordem da listagem do diretório
+        if len(metadata_paths) >= INDEX_REBUILD_PARALLEL_MIN_FILES:
+            with ThreadPoolExecutor(max_workers=INDEX_REBUILD_WORKERS) as executor:
+                lines = [line for line in executor.map(self._index_line_from_file, metadata_paths) if line]
+        else:
+            lines = [line for line in map(self._index_line_from_file, metadata_paths) if line]
+        
+        tmp_path = self._index_path.with_suffix(".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self._index_path)
+        self._index_dead_records = 0
+        self._index_state = None
+        logger.info(f"📇 Rebuilt metadata index with {len(lines)} entries")
+    
+    @staticmethod
+    def _index_line_from_file(metadata_path: str) -> Optional[bytes]:
+        """Linha do índice para um .json de metadata (None para arquivos ilegíveis ou sem file_path)"""
+        try:
+            with open(metadata_path, 'rb') as f:
+                metadata = _json_loads(f.read())
+        except Exception as e:
+            logger.error(f"Error reading metadata {metadata_path}: {e}")
+            return None
+        if not metadata.get('file_path'):
+            return None
+        metadata.setdefault('process_id', os.path.basename(metadata_path)[:-len(".json")])
+        # Todo registro do índice tem file_size (save_file sempre grava; aqui, metadata antigo)
+        metadata.setdefault('file_size', 0)
+        return _json_line(metadata)
     
-    def save_file(self, process_id: str, excel_bytes: bytes, metadata: Dict) -> str:
+    def _read_index(self) -> Tuple[Dict[str, Dict], int]:
+        """
+        Lê o índice: metadata vivo por process_id (o último registro vence; tombstone remove)
+        Retorna também quantos registros no arquivo não estão mais vivos (para compactação)
+        Só a leitura do arquivo é feita sob o lock; o parse das linhas não bloqueia outras threads
+        
+        Leitura incremental: enquanto o arquivo do índice é o mesmo (mesmo inode, só cresceu), apenas
+        as linhas acrescentadas desde a última leitura são lidas e aplicadas sobre as entradas já
+        conhecidas. Compactação e reconstrução trocam o arquivo (os.replace) e forçam a leitura completa
+        """
+        with self._lock:
+            with self._open_index('rb') as f:
+                stat = os.fstat(f.fileno())
+                base_state = self._index_state
+                if base_state is not None and base_state[0] == stat.st_ino and base_state[1] <= stat.st_size:
+                    _, offset, line_count, base_entries = base_state
+                    f.seek(offset)
+                else:
+                    offset, line_count, base_entries = 0, 0, {}
+                data = f.read()
+        
+        # Só linhas completas avançam o offset: um final sem '\n' é relido na próxima leitura
+        consumed = data.rfind(b'\n') + 1
+        lines = data[:consumed].splitlines()
+        line_count += len(lines)
+        
+        entries: Dict[str, Dict] = dict(base_entries)
+        for line in lines:
+            try:
+                record = _json_loads(line)
+            except ValueError:
+                # Linha truncada (escrita interrompida): ignorar
+                continue
+            if record.get('deleted'):
+                entries.pop(record.get('process_id'), None)
+            else:
+                entries[record['process_id']] = record
+        
+        with self._lock:
+            # Só avança o estado se nenhuma outra leitura/escrita o trocou enquanto este parse rodava
+            if self._index_state is base_state:
+                self._index_state = (stat.st_ino, offset + consumed, line_count, entries)
+            self._index_dead_records = line_count - len(entries)
+        return entries, line_count - len(entries)
+    
+    def _remove_from_index(self, *process_ids: str):
+        """Registra as remoções (tombstones) no índice e o compacta quando passam do limite"""
+        if not process_ids:
+            return
+        self._list_cache = None
+        with self._lock:
+            with self._open_index('ab') as f:
+                f.writelines(_json_line({"process_id": process_id, "deleted": True}) for process_id in process_ids)
+            
+            # Cada remoção deixa dois registros mortos (o metadata e o tombstone): o índice só é
+            # relido (contagem exata) quando a estimativa chega ao limite de compactação
+            if self._index_dead_records is not None:
+                self._index_dead_records += 2 * len(process_ids)
+                if self._index_dead_records < INDEX_COMPACT_MIN_TOMBSTONES:
+                    return
+            entries, dead_records = self._read_index()
+            if dead_records < INDEX_COMPACT_MIN_TOMBSTONES:
+                return
+            # Reescrita (temporário + rename) só com os registros vivos
+            tmp_path = self._index_path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.writelines(_json_line(record) for record in entries.values())
+            os.replace(tmp_path, self._index_path)
+            self._index_dead_records = 0
+            self._index_state = None
+        logger.info(f"📇 Compacted metadata index: {dead_records} stale records dropped")
+    
+    def _metadata_path(self, process_id: str) -> str:
+        """Caminho do .json de metadata de um process_id"""
+        return f"{self._metadata_dir_str}{os.sep}{process_id}.json"
+    
+    def save_file(
+        self, process_id: str, excel_source: Union[bytes, BinaryIO, str, os.PathLike], metadata: Dict
+    ) -> str:
         """
         Save Excel file to disk with metadata
+        excel_source: bytes, caminho de um arquivo já em disco (copiado, o original é mantido)
+        ou file object binário (copiado em blocos, sem ler tudo em memória)
         Returns: file path
+        
+        Prefira save_file_from_path quando o arquivo já foi escrito em create_temp_path:
+        ele é movido, sem cópia nenhuma
         """
-        filename = f"mega-sena-{process_id[:8]}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.xlsx"
-        file_path = self._storage_dir / filename
+        tmp_path = self.create_temp_path()
+        try:
+            if isinstance(excel_source, (bytes, bytearray, memoryview)):
+                _write_bytes(tmp_path, excel_source)
+            elif isinstance(excel_source, (str, os.PathLike)):
+                # copyfile copia no kernel (sendfile) no Linux, sem passar o conteúdo pelo Python
+                shutil.copyfile(excel_source, tmp_path)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    shutil.copyfileobj(excel_source, f, COPY_BUFFER_SIZE)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return self.save_file_from_path(process_id, tmp_path, metadata)
+    
+    def create_temp_path(self) -> Path:
+        """
+        Caminho temporário (vazio) no diretório de armazenamento, para o Excel ser escrito direto
+        em disco e depois publicado por save_file_from_path (rename atômico, mesmo filesystem)
+        """
+        with tempfile.NamedTemporaryFile(dir=self._storage_dir, suffix=".xlsx.tmp", delete=False) as tmp_file:
+            return Path(tmp_file.name)
+    
+    def save_file_from_path(self, process_id: str, tmp_path: Path, metadata: Dict) -> str:
+        """
+        Publica um Excel já escrito em disco (normalmente em create_temp_path) com seu metadata
+        O arquivo é movido com os.replace, sem copiar seu conteúdo
+        Returns: file path
+        """
+        # Um único now() para o nome e o created_at; formato %Y%m%d-%H%M%S montado direto dos campos
+        now = datetime.now()
+        filename = (
+            f"mega-sena-{process_id[:8]}-{now.year:04d}{now.month:02d}{now.day:02d}"
+            f"-{now.hour:02d}{now.minute:02d}{now.second:02d}.xlsx"
+        )
+        file_path = f"{self._storage_dir_str}{os.sep}{filename}"
         
         # Save file
-        with open(file_path, 'wb') as f:
-            f.write(excel_bytes)
+        file_size = os.stat(tmp_path).st_size
+        os.replace(tmp_path, file_path)
         
         # Save metadata
-        metadata_file = self._metadata_dir / f"{process_id}.json"
+        metadata_file = self._metadata_path(process_id)
         metadata_data = {
             "process_id": process_id,
             "filename": filename,
-            "file_path": str(file_path),
-            "created_at": datetime.now().isoformat(),
-            "file_size": len(excel_bytes),
+            "file_path": file_path,
+            "created_at": now.isoformat(),
+            "file_size": file_size,
             **metadata
         }
         
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata_data, f, indent=2, ensure_ascii=False)
+        _write_bytes(metadata_file, _json_document(metadata_data))
+        self._metadata_cache.pop(process_id, None)
+        self._append_index(_json_line(metadata_data))
         
         logger.info(f"Saved file: {filename} (process_id: {process_id})")
-        return str(file_path)
+        return file_path
     
     def list_files(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """
         List all saved files with metadata
         Returns list sorted by creation date (newest first)
         Groups multi-part files into a single entry
+        
+        A listagem vem só do índice, sem conferir cada arquivo no disco: um arquivo removido por
+        fora do FileManager é podado quando get_file_path não o encontra
+        """
+        return self._sorted_listing()[offset:offset + limit]
+    
+    def _prune_missing_file(self, process_id: str):
+        """Remove metadata e registro no índice de um arquivo que não existe mais no disco"""
+        metadata_file = self._metadata_path(process_id)
+        logger.warning(f"File not found, removing metadata: {metadata_file}")
+        try:
+            os.unlink(metadata_file)
+        except FileNotFoundError:
+            pass
+        self._metadata_cache.pop(process_id, None)
+        self._remove_from_index(process_id)
+    
+    def _sorted_listing(self) -> List[Dict]:
+        """
+        Listagem completa (partes agrupadas, mais recentes primeiro) montada a partir do índice
+        Fica em cache enquanto o índice não muda (mtime + tamanho): uma chamada seguinte custa um stat
         """
+        try:
+            stat = self._index_path.stat()
+            index_key = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            index_key = None
+        
+        cached = self._list_cache
+        if cached is not None and index_key is not None and cached[0] == index_key:
+            return cached[1]
+        
         all_files = []
-        processed_main_ids = set()  # Track which main process_ids we've already added
         
-        # Read all metadata files
-        for metadata_file in self._metadata_dir.glob("*.json"):
+        # Metadata de todos os arquivos vem do índice (uma leitura), não de um .json por arquivo
+        entries, _ = self._read_index()
+        
+        for process_id, metadata in entries.items():
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                # Skip counter files (they don't have file_path)
-                file_path_str = metadata.get('file_path', '')
-                if not file_path_str:
-                    # This is likely a counter file, skip it
-                    continue
-                
-                # Ensure process_id exists (use filename as fallback)
-                if 'process_id' not in metadata:
-                    # Try to extract from filename or use metadata filename
-                    metadata['process_id'] = metadata_file.stem  # Use filename without extension
-                    logger.warning(f"Metadata missing process_id, using filename: {metadata_file.stem}")
-                
-                process_id = metadata.get('process_id', '')
-                
-                # Check if this is a part file (has -part suffix)
-                if '-part' in process_id:
+                # Check if this is a part file (-partN suffix): decidido pelo id, sem ler o metadata
+                if _is_part_id(process_id):
                     # This is a part file, skip it (will be handled by main file)
                     continue
                 
-                # Check if file still exists
-                file_path = Path(file_path_str)
-                if not (file_path.exists() and file_path.is_file()):
-                    # File was deleted, remove metadata
-                    logger.warning(f"File not found, removing metadata: {metadata_file}")
-                    metadata_file.unlink()
-                    continue
-                
                 # Check if this is a multi-part file
                 if metadata.get('is_multi_part') or metadata.get('is_multi_file'):
-                    # Get all part files
-                    part_files = self.get_all_file_parts(process_id)
+                    # Get all part files (também do índice)
+                    part_files = self._get_parts_from_meta(metadata, entries.get)
                     if part_files:
                         # Create aggregated metadata
-                        total_size = sum(p.get('file_size', 0) for p in part_files)
+                        total_size = sum(map(_get_file_size, part_files))
                         main_metadata = {
                             **metadata,
                             'total_files': len(part_files),
@@ -111,53 +395,58 @@ class FileManager:
                             'display_name': f"{metadata.get('filename', process_id[:8])} ({len(part_files)} arquivos)"
                         }
                         all_files.append(main_metadata)
-                        processed_main_ids.add(process_id)
                     else:
                         # Multi-part but no parts found, add main file
                         all_files.append(metadata)
-                        processed_main_ids.add(process_id)
                 else:
                     # Single file
                     all_files.append(metadata)
-                    processed_main_ids.add(process_id)
                     
             except Exception as e:
-                logger.error(f"Error reading metadata {metadata_file}: {e}")
+                logger.error(f"Error listing metadata for {process_id}: {e}")
         
         # Sort by creation date (newest first)
         all_files.sort(key=lambda x: x.get('created_at', ''), reverse=True)
         
-        # Apply pagination
-        return all_files[offset:offset + limit]
+        # A chave é lida antes do índice: uma escrita concorrente só invalida o cache mais cedo.
+        # Sem índice (reconstruído agora) não há chave confiável: a próxima chamada faz o cache
+        if index_key is not None:
+            self._list_cache = (index_key, all_files)
+        return all_files
     
     def get_all_file_parts(self, process_id: str) -> List[Dict]:
         """
         Get all file parts for a process_id (including split files)
         Returns list of file metadata dicts for part files only (not main)
         """
-        files = []
-        
         # Get main file metadata
         main_metadata = self.get_file_metadata(process_id)
         if not main_metadata:
-            return files
+            return []
         
         # Check if this is a multi-file entry
         if main_metadata.get('is_multi_file', False) or main_metadata.get('is_multi_part', False):
-            file_parts = main_metadata.get('file_parts', [])
-            
-            # Add all part files (not main file)
-            for part_id in file_parts:
-                # part_id might be like "process_id-part1" or "process_id-part1.json"
-                part_id_clean = part_id.replace('.json', '')
-                part_metadata = self.get_file_metadata(part_id_clean)
-                if part_metadata:
-                    files.append(part_metadata)
-        else:
-            # Single file - return empty list (not a multi-part)
-            pass
+            return self._get_parts_from_meta(main_metadata, self.get_file_metadata)
         
-        return files
+        # Single file - return empty list (not a multi-part)
+        return []
+    
+    @staticmethod
+    def _get_parts_from_meta(
+        main_metadata: Dict, lookup: Callable[[str], Optional[Dict]]
+    ) -> List[Dict]:
+        """
+        Metadata das partes listadas em file_parts de um metadata principal já carregado
+        lookup resolve cada parte (entradas do índice na listagem, get_file_metadata nas demais)
+        Partes sem metadata ficam de fora
+        """
+        parts = []
+        for part_id in main_metadata.get('file_parts', []):
+            # part_id might be like "process_id-part1" or "process_id-part1.json"
+            part_metadata = lookup(part_id.replace('.json', ''))
+            if part_metadata:
+                parts.append(part_metadata)
+        return parts
     
     def get_file_paths_for_check(self, process_id: str) -> List[Path]:
         """
@@ -169,26 +458,40 @@ class FileManager:
         
         for file_meta in files:
             file_path_str = file_meta.get('file_path', '')
-            if file_path_str:
-                file_path = Path(file_path_str)
-                if file_path.exists():
-                    file_paths.append(file_path)
+            # Um stat por parte, direto no caminho em str (sem exists() + is_file())
+            if file_path_str and os.path.isfile(file_path_str):
+                file_paths.append(Path(file_path_str))
         
         return file_paths
     
     def get_file_metadata(self, process_id: str) -> Optional[Dict]:
-        """Get metadata for a specific file by process_id"""
-        metadata_file = self._metadata_dir / f"{process_id}.json"
+        """
+        Get metadata for a specific file by process_id
+        O dict lido fica em cache enquanto o .json não muda (mtime + tamanho): uma chamada seguinte
+        custa um stat. O dict retornado é compartilhado com o cache e não deve ser modificado
+        """
+        metadata_file = self._metadata_path(process_id)
         
-        if not metadata_file.exists():
+        try:
+            stat = os.stat(metadata_file)
+        except FileNotFoundError:
+            self._metadata_cache.pop(process_id, None)
             return None
+        file_key = (stat.st_mtime_ns, stat.st_size)
+        
+        cached = self._metadata_cache.get(process_id)
+        if cached is not None and cached[0] == file_key:
+            return cached[1]
         
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(metadata_file, 'rb') as f:
+                metadata = _json_loads(f.read())
         except Exception as e:
             logger.error(f"Error reading metadata {metadata_file}: {e}")
             return None
+        
+        self._metadata_cache[process_id] = (file_key, metadata)
+        return metadata
     
     def get_file_path(self, process_id: str) -> Optional[Path]:
         """Get file path for a process_id"""
@@ -200,9 +503,11 @@ class FileManager:
         if not file_path_str:
             return None
         
-        file_path = Path(file_path_str)
-        if file_path.exists() and file_path.is_file():
-            return file_path
+        # is_file já implica exists (um stat só)
+        if os.path.isfile(file_path_str):
+            return Path(file_path_str)
+        # File was deleted, remove metadata (a listagem não confere o disco)
+        self._prune_missing_file(process_id)
         return None
     
     def delete_file(self, process_id: str) -> bool:
@@ -215,49 +520,45 @@ class FileManager:
         file_path_str = metadata.get('file_path', '')
         if file_path_str:
             # This is a file metadata, delete the actual file
-            file_path = Path(file_path_str)
-            if file_path.exists() and file_path.is_file():
-                try:
-                    file_path.unlink()
-                    logger.info(f"Deleted file: {file_path}")
-                except Exception as e:
-                    logger.error(f"Error deleting file {file_path}: {e}")
-            elif file_path.exists() and file_path.is_dir():
-                logger.warning(f"File path is a directory, skipping file deletion: {file_path}")
+            # (unlink direto, sem conferir antes: um syscall; arquivo já ausente não é erro)
+            try:
+                os.unlink(file_path_str)
+                logger.info(f"Deleted file: {file_path_str}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                if os.path.isdir(file_path_str):
+                    logger.warning(f"File path is a directory, skipping file deletion: {file_path_str}")
+                else:
+                    logger.error(f"Error deleting file {file_path_str}: {e}")
         else:
             # This might be a counter metadata file, which doesn't have a file_path
             logger.info(f"Metadata file for {process_id} has no file_path, skipping file deletion")
         
         # Delete metadata
-        metadata_file = self._metadata_dir / f"{process_id}.json"
-        if metadata_file.exists():
-            try:
-                metadata_file.unlink()
-                logger.info(f"Deleted metadata: {metadata_file}")
-            except Exception as e:
-                logger.error(f"Error deleting metadata {metadata_file}: {e}")
-                return False
+        self._metadata_cache.pop(process_id, None)
+        if file_path_str:
+            self._remove_from_index(process_id)
+        metadata_file = self._metadata_path(process_id)
+        try:
+            os.unlink(metadata_file)
+            logger.info(f"Deleted metadata: {metadata_file}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error deleting metadata {metadata_file}: {e}")
+            return False
         
         logger.info(f"Deleted file: {process_id}")
         return True
     
     def get_total_count(self) -> int:
-        """Get total number of saved files"""
-        count = 0
-        for metadata_file in self._metadata_dir.glob("*.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    file_path_str = metadata.get('file_path', '')
-                    # Skip counter files (they don't have file_path)
-                    if not file_path_str:
-                        continue
-                    file_path = Path(file_path_str)
-                    if file_path.exists() and file_path.is_file():
-                        count += 1
-            except:
-                pass
-        return count
+        """
+        Get total number of saved files
+        Conta as mesmas entradas da listagem (partes de multi-arquivo contam no arquivo principal),
+        a partir da listagem em cache
+        """
+        return len(self._sorted_listing())
 
 
 # Global instance
@@ -5,15 +5,101 @@ Ensures proportional distribution based on target distribution
 """
 import numpy as np
 import time
+from itertools import chain
 from typing import List, Dict, Tuple, Optional
 import logging
 from app.models.generation import GameConstraints
 from app.services.number_frequency_analyzer import number_frequency_analyzer
+from app.services.dozen_analyzer import dozen_analyzer
 from app.services.generator import GenerationEngine
 from app.services.game_validator import TernosDuplasCache
 
 logger = logging.getLogger(__name__)
 
+# Tentativas da estratégia mista (+1/-1 sorteado por número) em _mutate_game_to_region
+MIXED_MUTATION_ATTEMPTS = 5
+
+# Tolerância para dispensar o balanceamento: distância L1 entre as distribuições atual e alvo
+# até max(BALANCE_TOLERANCE_MIN, BALANCE_TOLERANCE_RATIO * target_quantity) jogos
+BALANCE_TOLERANCE_RATIO = 0.02
+BALANCE_TOLERANCE_MIN = 2
+
+
+def _games_to_array(games: List[List[int]], numbers_per_game: int) -> np.ndarray:
+    """
+    Jogos (todos com numbers_per_game números) como uma matriz (N, k) int8
+    np.fromiter sobre os números achatados: uma passada, sem uma lista Python por linha
+    """
+    flat = np.fromiter(chain.from_iterable(games), dtype=np.int8, count=len(games) * numbers_per_game)
+    return flat.reshape(len(games), numbers_per_game)
+
+
+def _array_to_games(games_array: np.ndarray) -> List[List[int]]:
+    """Inverso de _games_to_array: linhas da matriz como listas de int (formato de saída do balanceador)"""
+    return games_array.tolist()
+
+
+def _append_game(games_buffer: np.ndarray, n_filled: int, game: List[int]) -> np.ndarray:
+    """
+    Escreve game na linha n_filled do buffer pré-alocado (dobra a capacidade quando cheio)
+    Retorna o buffer, que é outro array quando precisou crescer
+    """
+    if n_filled == len(games_buffer):
+        grown = np.empty((max(2 * len(games_buffer), 1), games_buffer.shape[1]), dtype=games_buffer.dtype)
+        grown[:n_filled] = games_buffer
+        games_buffer = grown
+    games_buffer[n_filled] = game
+    return games_buffer
+
+
+def _force_first_number(candidates: np.ndarray, target_first_num: int) -> np.ndarray:
+    """
+    Candidatas (linhas já no intervalo 1-60) que aceitam target_first_num como primeiro número:
+    sem números repetidos e com o alvo já como menor número, ou ausente e menor que o segundo menor.
+    Retorna essas linhas ordenadas, com o menor número trocado pelo alvo
+    """
+    ordered = np.sort(candidates, axis=1)
+    distinct = (ordered[:, 1:] != ordered[:, :-1]).all(axis=1)
+    has_target = (ordered == target_first_num).any(axis=1)
+    forceable = (ordered[:, 0] == target_first_num) | (~has_target & (ordered[:, 1] > target_first_num))
+    forced = ordered[distinct & forceable]
+    forced[:, 0] = target_first_num
+    return forced
+
+
+def _pack_game(game: List[int]) -> int:
+    """
+    Chave do jogo para sets de duplicatas: bitmask dos números (bit n-1 para o número n)
+    Independe da ordem, então dispensa o tuple(sorted(...)); 60 números cabem em 60 bits
+    """
+    mask = 0
+    for num in game:
+        mask |= 1 << (num - 1)
+    return mask
+
+
+def _pack_games(games_array: np.ndarray) -> np.ndarray:
+    """Mesma chave de _pack_game para todas as linhas da matriz de jogos, numa passada vetorizada"""
+    bits = np.left_shift(np.uint64(1), games_array.astype(np.uint64) - np.uint64(1))
+    return np.bitwise_or.reduce(bits, axis=1)
+
+
+def _log_top_numbers(games_array: np.ndarray, top: int = 10) -> None:
+    """
+    Loga os `top` números mais frequentes da matriz de jogos
+    bincount conta os 60 números em C; argpartition separa o top sem ordenar todos
+    """
+    counts = np.bincount(games_array.ravel(), minlength=61)[1:]
+    top = min(top, int(np.count_nonzero(counts)))
+    if not top:
+        return
+    top_idx = np.argpartition(-counts, top - 1)[:top]
+    top_idx = top_idx[np.argsort(-counts[top_idx], kind='stable')]
+    total = games_array.size
+    for idx in top_idx:
+        count = int(counts[idx])
+        logger.info(f"  Número {idx + 1}: {count} ocorrências ({count / total * 100:.2f}%)")
+
 
 class GameBalancer:
     """Balances game distribution before final output"""
@@ -48,77 +134,102 @@ class GameBalancer:
         
         logger.info(f"⚖️ Starting balance: {len(games)} games, target: {target_quantity}")
         
+        # Jogos vazios ou com tamanho errado seriam descartados na validação final de qualquer forma:
+        # saem já aqui, e os demais viram uma matriz (N, k) usada nas análises vetorizadas
+        numbers_per_game = constraints.numbers_per_game
+        regular_games = [game for game in games if game and len(game) == numbers_per_game]
+        if len(regular_games) != len(games):
+            logger.warning(f"⚠️ Ignoring {len(games) - len(regular_games)} empty or malformed games")
+            games = regular_games
+        games_array = _games_to_array(games, numbers_per_game)
+        # Primeiro número (após ordenar) de cada jogo = mínimo da linha, calculado uma única vez
+        first_nums = games_array.min(axis=1)
+        
         # 1. Analyze current distribution
-        current_distribution = self._analyze_distribution(games)
+        current_distribution = self._analyze_distribution(first_nums)
         
         # 2. Get target distribution
         target_distribution = self._get_target_distribution(target_quantity)
         
-        # 3. Calculate needed adjustments
-        adjustments = self._calculate_adjustments(
-            current_distribution, 
-            target_distribution, 
-            len(games),
-            target_quantity
+        # Distribuição já próxima do alvo (e jogos suficientes): os ajustes são dispensados e os
+        # jogos seguem direto para a validação final (duplicatas e ternos/duplas)
+        current_counts = np.fromiter((current_distribution[num] for num in range(1, 61)), dtype=np.int64, count=60)
+        target_counts = np.fromiter((target_distribution.get(num, 0) for num in range(1, 61)), dtype=np.int64, count=60)
+        distribution_distance = int(np.abs(current_counts - target_counts).sum())
+        within_tolerance = (
+            len(games) >= target_quantity
+            and distribution_distance <= max(BALANCE_TOLERANCE_MIN, BALANCE_TOLERANCE_RATIO * target_quantity)
         )
         
-        # 4. Apply adjustments: remove excess and generate missing
-        # Check timeout before applying adjustments
+        # Check timeout before calculating and applying adjustments
         if time.time() - start_time > max_balance_time:
             logger.warning(f"⏱️ Balance timeout reached, returning original games")
             return games[:target_quantity] if len(games) >= target_quantity else games
         
         # Log current distribution before balancing
-        logger.info("📊 Current distribution (before balance):")
-        current_by_number = {}
-        for game in games:
-            if game:
-                # Count occurrences of each number
-                for num in game:
-                    current_by_number[num] = current_by_number.get(num, 0) + 1
-        top_numbers = sorted(current_by_number.items(), key=lambda x: x[1], reverse=True)[:10]
-        for num, count in top_numbers:
-            pct = (count / (len(games) * constraints.numbers_per_game) * 100) if games else 0
-            logger.info(f"  Número {num}: {count} ocorrências ({pct:.2f}%)")
-        
-        balanced_games = self._apply_adjustments(
-            games, 
-            adjustments, 
-            constraints,
-            target_quantity
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📊 Current distribution (before balance):")
+            _log_top_numbers(games_array)
+        
+        if within_tolerance:
+            logger.info(
+                f"✅ Distribution already within tolerance (distance: {distribution_distance}), skipping adjustments"
+            )
+            balanced_array, validated_keys = games_array, set()
+        else:
+            # 3. Calculate needed adjustments
+            adjustments = self._calculate_adjustments(
+                current_distribution, 
+                target_distribution, 
+                len(games),
+                target_quantity
+            )
+            
+            # 4. Apply adjustments: remove excess and generate missing
+            balanced_array, validated_keys = self._apply_adjustments(
+                games_array,
+                first_nums,
+                adjustments, 
+                constraints,
+                target_quantity
+            )
         
         # FINAL VALIDATION: Remove any games that violate ternos/duplas rules
         # This ensures the final list is completely valid
+        # Jogos gerados em _apply_adjustments (validated_keys) já foram validados contra todos os
+        # jogos originais e os gerados antes deles: só entram no cache, sem nova validação
         logger.info("🔍 Performing final validation of balanced games...")
-        final_valid_games = []
         final_ternos_cache = TernosDuplasCache() if not constraints.fixed_numbers else None
-        final_games_set = set()  # Use set for O(1) duplicate checking
         
-        removed_count = 0
-        for game in balanced_games:
-            if not game or len(game) != constraints.numbers_per_game:
-                removed_count += 1
-                continue
-            
-            game_tuple = tuple(sorted(game))
-            
-            # Check duplicates using set (much faster)
-            if game_tuple in final_games_set:
-                removed_count += 1
-                continue
-            
-            # Validate ternos/duplas
-            if final_ternos_cache:
-                is_valid, reason = final_ternos_cache.validate_game(game)
-                if not is_valid:
-                    removed_count += 1
-                    logger.debug(f"❌ Removed invalid game {game}: {reason}")
-                    continue
+        balanced_games = _array_to_games(balanced_array)
+        # Duplicatas: np.unique sobre as chaves (_pack_games) mantém a primeira ocorrência de cada jogo,
+        # na ordem original, sem checar um set jogo a jogo
+        game_keys = _pack_games(balanced_array)
+        _, first_indices = np.unique(game_keys, return_index=True)
+        first_indices.sort()
+        
+        # Jogos aceitos marcados numa máscara; a lista final é montada uma vez no fim
+        keep = np.zeros(len(balanced_games), dtype=bool)
+        if final_ternos_cache:
+            for idx in first_indices.tolist():
+                game = balanced_games[idx]
+                
+                # Validate ternos/duplas
+                if game_keys[idx] not in validated_keys:
+                    is_valid, reason = final_ternos_cache.validate_game(game)
+                    if not is_valid:
+                        logger.debug(f"❌ Removed invalid game {game}: {reason}")
+                        continue
                 final_ternos_cache.add_game(game)
-            
-            final_valid_games.append(game)
-            final_games_set.add(game_tuple)
+                keep[idx] = True
+        else:
+            keep[first_indices] = True
+        
+        kept_indices = np.flatnonzero(keep)
+        final_valid_games = [balanced_games[idx] for idx in kept_indices.tolist()]
+        # Bitmasks (_pack_game) of accepted games, for O(1) duplicate checking when regenerating
+        final_games_set = set(game_keys[kept_indices].tolist())
+        removed_count = len(balanced_games) - len(final_valid_games)
         
         if removed_count > 0:
             logger.warning(f"⚠️ Removed {removed_count} invalid games during final validation")
@@ -138,13 +249,14 @@ class GameBalancer:
             logger.info(f"🔄 Regenerating {needed} games to replace invalid ones...")
             
             rng = np.random.RandomState()
-            all_final_set = {tuple(sorted(g)) for g in final_valid_games}
+            # final_games_set já contém exatamente os jogos de final_valid_games
+            all_final_set = final_games_set
             
             for _ in range(needed * 10):  # Allow many attempts
                 game = self._generator._generate_fallback_game(constraints, rng)
-                if game:
-                    game_tuple = tuple(sorted(game))
-                    if game_tuple not in all_final_set:
+                if game and len(game) == numbers_per_game:
+                    game_key = _pack_game(game)
+                    if game_key not in all_final_set:
                         # Validate ternos/duplas
                         if final_ternos_cache:
                             is_valid, reason = final_ternos_cache.validate_game(game)
@@ -153,23 +265,15 @@ class GameBalancer:
                             final_ternos_cache.add_game(game)
                         
                         final_valid_games.append(game)
-                        all_final_set.add(game_tuple)
+                        all_final_set.add(game_key)
                         
                         if len(final_valid_games) >= target_quantity:
                             break
         
         # Log final distribution after balancing
-        logger.info("📊 Final distribution (after balance and validation):")
-        final_by_number = {}
-        for game in final_valid_games:
-            if game:
-                # Count occurrences of each number
-                for num in game:
-                    final_by_number[num] = final_by_number.get(num, 0) + 1
-        top_numbers = sorted(final_by_number.items(), key=lambda x: x[1], reverse=True)[:10]
-        for num, count in top_numbers:
-            pct = (count / (len(final_valid_games) * constraints.numbers_per_game) * 100) if final_valid_games else 0
-            logger.info(f"  Número {num}: {count} ocorrências ({pct:.2f}%)")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📊 Final distribution (after balance and validation):")
+            _log_top_numbers(_games_to_array(final_valid_games, numbers_per_game))
         
         elapsed = time.time() - start_time
         logger.info(
@@ -179,16 +283,10 @@ class GameBalancer:
         
         return final_valid_games[:target_quantity]  # Ensure exact quantity
     
-    def _analyze_distribution(self, games: List[List[int]]) -> Dict[int, int]:
-        """Analyze current distribution of first numbers"""
-        distribution = {num: 0 for num in range(1, 61)}
-        
-        for game in games:
-            if game:
-                first_num = sorted(game)[0]
-                distribution[first_num] = distribution.get(first_num, 0) + 1
-        
-        return distribution
+    def _analyze_distribution(self, first_nums: np.ndarray) -> Dict[int, int]:
+        """Analyze current distribution of first numbers (bincount sobre o primeiro número de cada jogo)"""
+        counts = np.bincount(first_nums, minlength=61)
+        return {num: int(counts[num]) for num in range(1, 61)}
     
     def _get_target_distribution(self, total_games: int) -> Dict[int, int]:
         """
@@ -270,18 +368,21 @@ class GameBalancer:
     
     def _apply_adjustments(
         self,
-        games: List[List[int]],
+        games_array: np.ndarray,
+        first_nums: np.ndarray,
         adjustments: Dict[int, int],
         constraints: GameConstraints,
         target_quantity: int
-    ) -> List[List[int]]:
-        """Apply adjustments: remove excess games and generate missing ones"""
-        import random
+    ) -> Tuple[np.ndarray, set]:
+        """
+        Apply adjustments: remove excess games and generate missing ones
+        Recebe e retorna os jogos como matriz (N, k) int8, junto com as chaves (_pack_game)
+        dos jogos gerados aqui, já validados (ternos/duplas)
+        """
         start_time = time.time()
         max_adjustment_time = 240  # 4 minutes max for adjustments
-        
-        # Create working copy
-        balanced_games = games.copy()
+        rng = np.random.RandomState()
+        validated_keys = set()
         
         # 1. Remove excess games (prioritize numbers that are over-represented)
         to_remove = {}
@@ -291,60 +392,69 @@ class GameBalancer:
         
         if to_remove:
             logger.info(f"🗑️ Removing {sum(to_remove.values())} excess games")
-            # Group games by first number
-            games_by_first = {num: [] for num in range(1, 61)}
-            for game in balanced_games:
-                if game:
-                    first_num = sorted(game)[0]
-                    games_by_first[first_num].append(game)
+            # Group games by first number (índices das linhas da matriz, não os jogos): argsort
+            # estável agrupa os índices por primeiro número e searchsorted acha os limites de cada grupo
+            order = np.argsort(first_nums, kind='stable')
+            bounds = np.searchsorted(first_nums[order], np.arange(1, 62))
+            games_by_first = {num: order[bounds[num - 1]:bounds[num]] for num in range(1, 61)}
             
             # Remove excess games - CRITICAL: Remove ALL excess, prioritizing problematic games
             # First, identify games with validation issues to remove them first
             validation_cache = TernosDuplasCache() if not constraints.fixed_numbers else None
             if validation_cache:
                 # Populate cache with all games
-                for game in balanced_games:
-                    if game:
-                        validation_cache.add_game(game)
+                for game in games_array.tolist():
+                    validation_cache.add_game(game)
             
+            # Índices a remover: acumulados aqui e removidos numa única reconstrução da lista
+            drop_indices = set()
             for num, count_to_remove in sorted(to_remove.items(), key=lambda x: x[1], reverse=True):
                 available = games_by_first.get(num, [])
                 if len(available) >= count_to_remove:
                     # Prioritize removing games with validation issues
-                    problematic_games = []
-                    valid_games = []
+                    problematic_indices = []
+                    valid_indices = []
                     
                     if validation_cache:
-                        for game in available:
-                            is_valid, reason = validation_cache.validate_game(game)
+                        for idx in available:
+                            is_valid, reason = validation_cache.validate_game(games_array[idx].tolist())
                             if not is_valid:
-                                problematic_games.append(game)
+                                problematic_indices.append(idx)
                             else:
-                                valid_games.append(game)
+                                valid_indices.append(idx)
+                    else:
+                        valid_indices = available
                     
                     # Remove problematic games first, then random from valid
-                    to_remove_list = []
-                    if len(problematic_games) >= count_to_remove:
-                        to_remove_list = random.sample(problematic_games, count_to_remove)
+                    if len(problematic_indices) >= count_to_remove:
+                        chosen = rng.choice(problematic_indices, count_to_remove, replace=False).tolist()
                     else:
-                        to_remove_list = problematic_games[:]
-                        remaining = count_to_remove - len(to_remove_list)
-                        if remaining > 0 and valid_games:
-                            to_remove_list.extend(random.sample(valid_games, min(remaining, len(valid_games))))
+                        chosen = problematic_indices
+                        remaining = count_to_remove - len(chosen)
+                        if remaining > 0 and len(valid_indices):
+                            chosen = chosen + rng.choice(valid_indices, min(remaining, len(valid_indices)), replace=False).tolist()
                     
-                    for game_to_remove in to_remove_list:
-                        balanced_games.remove(game_to_remove)
-                        games_by_first[num].remove(game_to_remove)
-                        if validation_cache:
-                            # Note: We can't easily remove from cache, but that's OK
-                            pass
-                    logger.info(f"🗑️ Removed {len(to_remove_list)} games with first number {num} (had {len(available)}, now {len(games_by_first[num])})")
+                    drop_indices.update(chosen)
+                    logger.info(f"🗑️ Removed {len(chosen)} games with first number {num} (had {len(available)}, now {len(available) - len(chosen)})")
                 else:
                     # Remove all available if we need more than available
                     logger.warning(f"⚠️ Only {len(available)} games available for number {num}, but need to remove {count_to_remove}")
-                    for game_to_remove in available:
-                        balanced_games.remove(game_to_remove)
-                        games_by_first[num].remove(game_to_remove)
+                    drop_indices.update(available)
+            
+            if drop_indices:
+                keep = np.ones(len(first_nums), dtype=bool)
+                keep[list(drop_indices)] = False
+                games_array = games_array[keep]
+                first_nums = first_nums[keep]
+        
+        # Chaves (_pack_game) de todos os jogos atuais: montado uma vez e mantido a cada inserção
+        all_games_set = set(_pack_games(games_array).tolist())
+        
+        # Jogos atuais num buffer int8 pré-alocado com folga: cada inserção escreve a linha n_filled
+        # (_append_game) em vez de recriar a matriz
+        n_filled = len(games_array)
+        games_buffer = np.empty((max(int(1.2 * target_quantity), n_filled, 1), games_array.shape[1]), dtype=np.int8)
+        games_buffer[:n_filled] = games_array
         
         # 2. Generate missing games using MUTATION strategy
         to_generate = {}
@@ -360,32 +470,34 @@ class GameBalancer:
             ternos_cache = TernosDuplasCache() if not constraints.fixed_numbers else None
             if ternos_cache:
                 # Populate cache with ALL existing games to ensure proper validation
-                for game in balanced_games:
+                for game in games_array.tolist():
                     ternos_cache.add_game(game)
-                logger.info(f"📋 Populated ternos/duplas cache with {len(balanced_games)} existing games")
+                logger.info(f"📋 Populated ternos/duplas cache with {n_filled} existing games")
+            
+            # Dezenas analisadas uma única vez; num_to_dozen[n] substitui get_dozen_for_number(n)
+            dozen_info = dozen_analyzer.analyze_dozens()
+            # (num_to_dozen_id é a mesma tabela com o índice da dezena, para indexar arrays)
+            num_to_dozen = [None] * 61
+            num_to_dozen_id = np.full(61, -1, dtype=np.int8)
+            dozen_ids = {}
+            for dozen_id, (dozen_key, dozen_data) in enumerate(dozen_info['dozens'].items()):
+                dozen_ids[dozen_key] = dozen_id
+                for dozen_num in dozen_data['numbers']:
+                    num_to_dozen[dozen_num] = dozen_key
+                    num_to_dozen_id[dozen_num] = dozen_id
             
             # Group numbers by dozen for efficient mutation
             to_generate_by_dozen = {}
             for num, count_needed in to_generate.items():
-                dozen_key = dozen_analyzer.get_dozen_for_number(num)
+                dozen_key = num_to_dozen[num]
                 if dozen_key not in to_generate_by_dozen:
                     to_generate_by_dozen[dozen_key] = {}
                 to_generate_by_dozen[dozen_key][num] = count_needed
             
             # Generate games for each dozen using mutation
-            rng = np.random.RandomState()
-            all_games_set = {tuple(sorted(g)) for g in balanced_games}
-            
-            # Get games from other dozens to use as base for mutation
-            games_by_dozen = {}
-            for game in balanced_games:
-                if game:
-                    # Group by the dozen of the first number
-                    first_num = sorted(game)[0]
-                    dozen_key = dozen_analyzer.get_dozen_for_number(first_num)
-                    if dozen_key not in games_by_dozen:
-                        games_by_dozen[dozen_key] = []
-                    games_by_dozen[dozen_key].append(game)
+            # Dezena do primeiro número de cada jogo (linhas de games_array, os jogos antes da mutação):
+            # os jogos base de outras dezenas saem de uma máscara sobre a matriz
+            game_dozen_ids = num_to_dozen_id[first_nums]
             
             # Process each dozen that needs more games
             for dozen_key, numbers_needed in sorted(to_generate_by_dozen.items(), key=lambda x: sum(x[1].values()), reverse=True):
@@ -395,14 +507,12 @@ class GameBalancer:
                     break
                 
                 logger.info(f"🔄 Processing dozen {dozen_key}: {sum(numbers_needed.values())} numbers needed")
+                dozen_numbers = dozen_info['dozens'].get(dozen_key, {}).get('numbers', [])
                 
-                # Get base games from other dozens (prefer dozens with more games)
-                base_games = []
-                for other_dozen, games in sorted(games_by_dozen.items(), key=lambda x: len(x[1]), reverse=True):
-                    if other_dozen != dozen_key:
-                        base_games.extend(games)
+                # Get base games from other dozens
+                base_matrix = games_array[game_dozen_ids != dozen_ids.get(dozen_key, -1)]
                 
-                if not base_games:
+                if not len(base_matrix):
                     # No base games available, skip this dozen
                     logger.warning(f"⚠️ No base games available for mutation in dozen {dozen_key}")
                     continue
@@ -422,18 +532,9 @@ class GameBalancer:
                     
                     logger.info(f"🔄 Mutating games to include number {num} (need {count_needed}, max {max_attempts} attempts)")
                     
-                    # Get dozen info for this number
-                    dozen_info = dozen_analyzer.analyze_dozens()
-                    dozen_numbers = dozen_info['dozens'].get(dozen_key, {}).get('numbers', [])
-                    
-                    # CRITICAL: If we have no base games, try to use any available games
-                    if not base_games and balanced_games:
-                        base_games = balanced_games[:min(1000, len(balanced_games))]  # Use up to 1000 games as base
-                        logger.info(f"⚠️ No base games from other regions, using {len(base_games)} games from current list")
-                    
-                    if not base_games:
-                        logger.warning(f"⚠️ No base games available for mutation, skipping number {num}")
-                        continue
+                    # Sorteios de todas as tentativas de uma vez: jogo base e sinais +1/-1 da estratégia mista
+                    picks = rng.randint(0, len(base_matrix), size=max_attempts)
+                    mixed_signs = rng.randint(0, 2, size=(max_attempts, MIXED_MUTATION_ATTEMPTS, constraints.numbers_per_game)) * 2 - 1
                     
                     while generated < count_needed and attempts < max_attempts:
                         attempts += 1
@@ -447,7 +548,7 @@ class GameBalancer:
                             break
                         
                         # Pick a random base game from other regions
-                        base_game = base_games[rng.randint(0, len(base_games))]
+                        base_game = base_matrix[picks[attempts - 1]]
                         
                         # Try to mutate the game to have the target first number
                         try:
@@ -455,40 +556,26 @@ class GameBalancer:
                             mutated_game = self._mutate_game_to_region(
                                 base_game,
                                 num,
-                                region_numbers,
+                                dozen_numbers,
                                 rng,
                                 constraints,
-                                balanced_games,
+                                games_buffer[:n_filled],
                                 all_games_set,
-                                ternos_cache
+                                ternos_cache,
+                                mixed_signs[attempts - 1]
                             )
                             
                             if mutated_game:
-                                game_tuple = tuple(sorted(mutated_game))
-                                
-                                # Double-check duplicates
-                                if game_tuple in all_games_set:
-                                    consecutive_failures_num += 1
-                                    continue
-                                
-                                # CRITICAL: Validate ternos/duplas BEFORE adding
-                                if ternos_cache:
-                                    is_valid, reason = ternos_cache.validate_game(mutated_game)
-                                    if not is_valid:
-                                        consecutive_failures_num += 1
-                                        logger.debug(f"❌ Mutated game {mutated_game} failed validation: {reason}")
-                                        continue
-                                
-                                # CRITICAL: Also validate using full validator for complete check
-                                from app.services.validation_level import ValidationLevel
-                                is_valid_basic = self._validator.validate_basic(mutated_game, constraints, ValidationLevel.NORMAL)
-                                if not is_valid_basic:
-                                    consecutive_failures_num += 1
-                                    continue
+                                # _mutate_game_to_region já checou duplicatas, ternos/duplas e validate_basic
+                                # contra este mesmo all_games_set/ternos_cache, sem inserções desde então:
+                                # validar de novo daria o mesmo resultado
+                                game_key = _pack_game(mutated_game)
                                 
                                 # All validations passed - add game
-                                balanced_games.append(mutated_game)
-                                all_games_set.add(game_tuple)
+                                games_buffer = _append_game(games_buffer, n_filled, mutated_game)
+                                n_filled += 1
+                                all_games_set.add(game_key)
+                                validated_keys.add(game_key)
                                 if ternos_cache:
                                     ternos_cache.add_game(mutated_game)  # Update cache
                                 generated += 1
@@ -510,21 +597,19 @@ class GameBalancer:
                         )
         
         # 3. Ensure we have exactly target_quantity
-        if len(balanced_games) > target_quantity:
-            # Remove excess randomly
-            excess = len(balanced_games) - target_quantity
-            to_remove_random = random.sample(balanced_games, excess)
-            for game in to_remove_random:
-                balanced_games.remove(game)
+        if n_filled > target_quantity:
+            # Remove excess randomly (sorteia os índices mantidos, preservando a ordem)
+            excess = n_filled - target_quantity
+            keep_indices = np.sort(rng.choice(n_filled, target_quantity, replace=False))
+            games_buffer = games_buffer[keep_indices]
+            n_filled = target_quantity
             logger.info(f"Removed {excess} excess games to reach target {target_quantity}")
-        elif len(balanced_games) < target_quantity:
+        elif n_filled < target_quantity:
             # Generate more games to reach target
-            needed = target_quantity - len(balanced_games)
+            needed = target_quantity - n_filled
             logger.info(f"Generating {needed} additional games to reach target")
             
             # Use simple fallback generation (no repetition constraints to avoid loops)
-            rng = np.random.RandomState()
-            all_games_set = {tuple(sorted(g)) for g in balanced_games}
             
             # Generate games with simple fallback (no strict repetition checking)
             generated_final = 0
@@ -537,9 +622,8 @@ class GameBalancer:
             final_ternos_cache_temp = TernosDuplasCache() if not constraints.fixed_numbers else None
             if final_ternos_cache_temp:
                 # Populate with existing games
-                for g in balanced_games:
-                    if g and len(g) == constraints.numbers_per_game:
-                        final_ternos_cache_temp.add_game(g)
+                for g in games_buffer[:n_filled].tolist():
+                    final_ternos_cache_temp.add_game(g)
             
             while generated_final < needed and attempts_final < max_final_attempts:
                 attempts_final += 1
@@ -549,9 +633,9 @@ class GameBalancer:
                     game = self._generator._generate_fallback_game(constraints, rng)
                     
                     if game and len(game) == constraints.numbers_per_game:
-                        game_tuple = tuple(sorted(game))
+                        game_key = _pack_game(game)
                         # Only check for complete duplicates, not repetition constraints
-                        if game_tuple not in all_games_set:
+                        if game_key not in all_games_set:
                             # CRITICAL: Validate ternos/duplas BEFORE adding
                             if final_ternos_cache_temp:
                                 is_valid, reason = final_ternos_cache_temp.validate_game(game)
@@ -559,8 +643,10 @@ class GameBalancer:
                                     continue  # Skip invalid games
                                 final_ternos_cache_temp.add_game(game)
                             
-                            balanced_games.append(game)
-                            all_games_set.add(game_tuple)
+                            games_buffer = _append_game(games_buffer, n_filled, game)
+                            n_filled += 1
+                            all_games_set.add(game_key)
+                            validated_keys.add(game_key)
                             generated_final += 1
                             
                             if generated_final % 50 == 0 or generated_final == needed:
@@ -572,28 +658,29 @@ class GameBalancer:
             if generated_final < needed:
                 logger.warning(
                     f"⚠️ Only generated {generated_final}/{needed} final games "
-                    f"after {attempts_final} attempts. Continuing with {len(balanced_games)} games."
+                    f"after {attempts_final} attempts. Continuing with {n_filled} games."
                 )
         
-        return balanced_games
+        return games_buffer[:n_filled], validated_keys
     
     def _mutate_game_to_region(
         self,
-        base_game: List[int],
+        base_game: np.ndarray,
         target_first_num: int,
         region_numbers: List[int],
         rng: np.random.RandomState,
         constraints: GameConstraints,
-        existing_games: List[List[int]],
+        existing_games: np.ndarray,
         all_games_set: set,
-        ternos_cache: Optional['TernosDuplasCache']
+        ternos_cache: Optional['TernosDuplasCache'],
+        mixed_signs: Optional[np.ndarray] = None
     ) -> Optional[List[int]]:
         """
         Mutate a game to include a specific number from a target dozen.
         Uses mutation strategies (+1, -1, mixed) and validates results.
         
         Args:
-            base_game: Original game to mutate
+            base_game: Original game to mutate (linha da matriz de jogos base)
             target_first_num: Target number to include (after sorting, this will be first if it's the smallest)
             region_numbers: Numbers in the target dozen (kept for compatibility)
             rng: Random number generator
@@ -601,99 +688,55 @@ class GameBalancer:
             existing_games: Existing games for validation
             all_games_set: Set of all games for duplicate checking
             ternos_cache: Cache for ternos/duplas validation
+            mixed_signs: Sinais +1/-1 já sorteados para a estratégia mista, shape (MIXED_MUTATION_ATTEMPTS, k);
+                sorteados aqui com rng quando omitidos
             
         Returns:
-            Mutated game if valid, None otherwise
+            Mutated game if valid (sem duplicata em all_games_set, aprovado por ternos_cache e
+            validate_basic), None otherwise
         """
         from app.services.validation_level import ValidationLevel
         
         # Mutation strategies: try to get target_first_num as first number
-        mutation_strategies = [
-            lambda n: n + 1,  # Add 1 to all
-            lambda n: n - 1,  # Subtract 1 from all
-            lambda n: n + (1 if rng.random() > 0.5 else -1),  # Mixed +1/-1
-        ]
-        
-        # Try each mutation strategy multiple times
-        for strategy in mutation_strategies:
-            for _ in range(5):  # Try each strategy 5 times
-                mutated = []
-                valid = True
-                
-                for num in base_game:
-                    new_num = strategy(num)
-                    # Validate: must be between 1-60
-                    if new_num < 1 or new_num > 60:
-                        valid = False
-                        break
-                    mutated.append(new_num)
-                
-                if not valid:
+        # Todas as tentativas viram linhas de uma matriz: +1 em todos, -1 em todos e
+        # MIXED_MUTATION_ATTEMPTS sorteios de +1/-1 por número (as estratégias fixas
+        # dariam o mesmo jogo a cada repetição, então basta uma tentativa de cada)
+        base = base_game.astype(np.int16)
+        deltas = np.empty((2 + MIXED_MUTATION_ATTEMPTS, base.size), dtype=np.int16)
+        deltas[0] = 1
+        deltas[1] = -1
+        if mixed_signs is None:
+            mixed_signs = rng.randint(0, 2, size=(MIXED_MUTATION_ATTEMPTS, base.size)) * 2 - 1
+        deltas[2:] = mixed_signs
+        candidates = base + deltas
+        # Validate: must be between 1-60 (uma comparação vetorizada para todas as tentativas)
+        in_range = ((candidates >= 1) & (candidates <= 60)).all(axis=1)
+        
+        # CRITICAL: Force target_first_num as first number (descarta numa passada vetorizada as
+        # tentativas com números repetidos ou em que o alvo não pode ser o primeiro número)
+        for sorted_mutated in _force_first_number(candidates[in_range], target_first_num).tolist():
+            # Validate fixed numbers if specified
+            if constraints.fixed_numbers and len(constraints.fixed_numbers) > 0:
+                if not all(n in constraints.fixed_numbers for n in sorted_mutated):
                     continue
-                
-                # Check for duplicates within the game
-                if len(set(mutated)) != len(mutated):
-                    continue
-                
-                # Sort
-                sorted_mutated = sorted(mutated)
-                
-                # CRITICAL: Force target_first_num as first number
-                actual_first = sorted_mutated[0]
-                if actual_first != target_first_num:
-                    # Try to force target_first_num as first number
-                    if target_first_num not in sorted_mutated:
-                        # Replace smallest number with target
-                        sorted_mutated[0] = target_first_num
-                        sorted_mutated = sorted(sorted_mutated)
-                        # Check if still valid (no duplicates)
-                        if len(set(sorted_mutated)) != len(sorted_mutated):
-                            continue
-                        # Update actual_first after replacement
-                        actual_first = sorted_mutated[0]
-                    else:
-                        # Target already in game, but not first - need to make it first
-                        # Find target position and swap with first
-                        target_idx = sorted_mutated.index(target_first_num)
-                        if target_idx > 0:
-                            # Swap first with target
-                            sorted_mutated[0], sorted_mutated[target_idx] = sorted_mutated[target_idx], sorted_mutated[0]
-                            sorted_mutated = sorted(sorted_mutated)  # Re-sort
-                            # Check if still valid
-                            if len(set(sorted_mutated)) != len(sorted_mutated):
-                                continue
-                            actual_first = sorted_mutated[0]
-                        else:
-                            # Target is already first, but check failed - skip
-                            continue
-                
-                # Final check: first number MUST match target
-                if sorted_mutated[0] != target_first_num:
-                    continue  # Skip this mutation
-                
-                # Validate fixed numbers if specified
-                if constraints.fixed_numbers and len(constraints.fixed_numbers) > 0:
-                    if not all(n in constraints.fixed_numbers for n in sorted_mutated):
-                        continue
-                
-                # Check for complete duplicates
-                game_tuple = tuple(sorted_mutated)
-                if game_tuple in all_games_set:
-                    continue  # Duplicate, try next mutation
-                
-                # Validate ternos/duplas
-                if ternos_cache:
-                    is_valid, reason = ternos_cache.validate_game(sorted_mutated)
-                    if not is_valid:
-                        continue  # Failed validation, try next mutation
-                
-                # Validate basic constraints
-                is_valid_basic = self._validator.validate_basic(sorted_mutated, constraints, ValidationLevel.NORMAL)
-                if not is_valid_basic:
-                    continue  # Failed basic validation, try next mutation
-                
-                # All validations passed
-                return sorted_mutated
+            
+            # Check for complete duplicates
+            if _pack_game(sorted_mutated) in all_games_set:
+                continue  # Duplicate, try next mutation
+            
+            # Validate ternos/duplas
+            if ternos_cache:
+                is_valid, reason = ternos_cache.validate_game(sorted_mutated)
+                if not is_valid:
+                    continue  # Failed validation, try next mutation
+            
+            # Validate basic constraints
+            is_valid_basic = self._validator.validate_basic(sorted_mutated, constraints, ValidationLevel.NORMAL)
+            if not is_valid_basic:
+                continue  # Failed basic validation, try next mutation
+            
+            # All validations passed
+            return sorted_mutated
         
         return None
 
@@ -29,7 +29,8 @@ class JobProcessor:
     
     def __init__(self):
         self._jobs: Dict[str, JobInfo] = {}
-        self._job_results: Dict[str, Union[bytes, List[bytes]]] = {}  # process_id -> excel_bytes or List[bytes]
+        # process_id -> excel_bytes or list of files (bytes, or saved path for incrementally saved files)
+        self._job_results: Dict[str, Union[bytes, str, List[Union[bytes, str]]]] = {}
         self._active_jobs: set = set()
         self._max_concurrent = settings.MAX_CONCURRENT_JOBS
         self._ttl = timedelta(seconds=settings.JOB_TTL_SECONDS)
@@ -345,12 +346,10 @@ class JobProcessor:
                 job_info.progress = 0.8
                 job_info.updated_at = datetime.now()
                 
-                # Track saved files for incremental save
-                saved_file_bytes = []  # Keep in memory too for download
-                
-                def incremental_save_callback(file_idx: int, file_bytes: bytes, file_metadata: dict):
-                    """Callback to save each file immediately after generation"""
-                    nonlocal saved_files_info, saved_file_bytes
+                # Track saved files for incremental save (on disk only: downloads read the saved path)
+                def incremental_save_callback(file_idx: int, file_bytes: bytes, file_metadata: dict) -> str:
+                    """Callback to save each file immediately after generation; returns the saved path"""
+                    nonlocal saved_files_info
                     file_process_id = f"{process_id}-part{file_idx + 1}"
                     combined_metadata = {**metadata, **file_metadata}
                     file_path = file_manager.save_file(file_process_id, file_bytes, combined_metadata)
@@ -359,7 +358,6 @@ class JobProcessor:
                         "process_id": file_process_id,
                         "file_path": file_path
                     })
-                    saved_file_bytes.append(file_bytes)  # Keep in memory for download
                     
                     # Update progress: 80% + (file_idx+1)/num_files * 15% (up to 95%)
                     if process_id in self._jobs:
@@ -371,6 +369,7 @@ class JobProcessor:
                             f"📊 Excel progress: {file_idx + 1}/{num_files_estimate} files saved "
                             f"({job_info.progress*100:.1f}% total)"
                         )
+                    return file_path
                 
                 # Generate Excel with incremental save
                 # Use a very large timeout (2x max time) or no timeout for big data
@@ -396,21 +395,23 @@ class JobProcessor:
                         timeout=excel_timeout
                     )
                     
-                    # If we have saved files incrementally, use those
-                    if saved_file_bytes:
-                        excel_result = saved_file_bytes
+                    # Files saved incrementally come back as their paths (not kept in memory)
+                    if saved_files_info:
                         logger.info(
-                            f"✅ Using {len(excel_result)} files from incremental saves"
+                            f"✅ Using {len(saved_files_info)} files from incremental saves"
                         )
                 except asyncio.TimeoutError:
                     # Even with extended timeout, if it times out, use saved files
-                    if saved_file_bytes:
+                    if saved_files_info:
                         logger.warning(
                             f"⏱️ Excel generation exceeded extended timeout ({excel_timeout/60:.1f} min), "
-                            f"but {len(saved_file_bytes)} files were saved incrementally. "
+                            f"but {len(saved_files_info)} files were saved incrementally. "
                             f"Using saved files..."
                         )
-                        excel_result = saved_file_bytes
+                        excel_result = [
+                            info["file_path"]
+                            for info in sorted(saved_files_info, key=lambda info: info["file_idx"])
+                        ]
                     else:
                         # No files saved yet, raise error
                         error_msg = (
@@ -424,23 +425,28 @@ class JobProcessor:
                 # Single file: use normal timeout
                 excel_timeout = self._max_processing_time * 0.2
                 
+                # Excel escrito direto num temporário do storage e publicado por rename:
+                # o arquivo nunca fica inteiro em memória como bytes
+                excel_tmp_path = file_manager.create_temp_path()
                 try:
                     # Update progress to show Excel generation started
                     job_info.progress = 0.8
                     job_info.updated_at = datetime.now()
                     
-                    excel_result = await asyncio.wait_for(
+                    await asyncio.wait_for(
                         loop.run_in_executor(
                             self._executor,
-                            self._excel_gen.generate_excel,
+                            self._excel_gen.generate_excel_file,
                             balanced_games,
                             request.constraints,
                             request.budget,
                             actual_games_generated,
-                            request.constraints.fixed_numbers
+                            request.constraints.fixed_numbers,
+                            excel_tmp_path
                         ),
                         timeout=excel_timeout
                     )
+                    excel_result = file_manager.save_file_from_path(process_id, excel_tmp_path, metadata)
                 except asyncio.TimeoutError:
                     error_msg = (
                         f"Geração do arquivo Excel excedeu o tempo limite ({excel_timeout/60:.1f} minutos). "
@@ -449,6 +455,9 @@ class JobProcessor:
                     )
                     logger.error(f"Timeout in Excel generation for job {process_id}: {error_msg}")
                     raise ValueError(error_msg)
+                finally:
+                    # Depois de salvo o temporário já foi movido; em erro/timeout ele é descartado
+                    excel_tmp_path.unlink(missing_ok=True)
             
             # Update progress after Excel generation (before final completion)
             job_info.progress = 0.95
@@ -469,7 +478,7 @@ class JobProcessor:
             job_info.updated_at = datetime.now()
             logger.info(f"✅ Progress updated to 100% before completion")
             
-            # Store result in memory (can be bytes or List[bytes])
+            # Store result (saved file path, or a list of bytes/paths for multiple files)
             self._job_results[process_id] = excel_result
             
             # Handle single file or multiple files
@@ -488,7 +497,7 @@ class JobProcessor:
                         "total_files": len(excel_result),
                         "file_parts": [f"{process_id}-part{i+1}" for i in range(len(excel_result))]
                     }
-                    # Save main metadata (use first file as reference)
+                    # Save main metadata (use first file as reference; a saved path is copied on disk)
                     file_manager.save_file(process_id, excel_result[0], main_metadata)
                 else:
                     # Save multiple files (normal mode - should not happen for big data)
@@ -515,9 +524,7 @@ class JobProcessor:
                         "file_parts": [f"{process_id}-part{i+1}" for i in range(len(excel_result))]
                     }
                     file_manager.save_file(process_id, excel_result[0], main_metadata)  # Save first file as main
-            else:
-                # Single file
-                file_manager.save_file(process_id, excel_result, metadata)
+            # Single file: already saved by save_file_from_path right after generation
             
             # CRITICAL: Create counter file AFTER Excel is generated using the games list
             # This ensures the counter file is always created with accurate data
@@ -612,10 +619,11 @@ class JobProcessor:
         
         return self._jobs.get(process_id)
     
-    def get_job_result(self, process_id: str) -> Optional[Union[bytes, List[bytes]]]:
+    def get_job_result(self, process_id: str) -> Optional[Union[bytes, str, List[Union[bytes, str]]]]:
         """
         Get job result (Excel file or list of files) by process_id
-        Returns bytes for single file, List[bytes] for multiple files
+        Returns the saved file path for a single file, a list for multiple files (bytes, or
+        the saved file path when the file was saved incrementally)
         """
         if process_id not in self._jobs:
             return None
@@ -186,6 +186,21 @@ class TestCounterFileCreation:
         assert data['counter']['2'] == 50, "Number 2 should be 50"
         assert data['total_generated'] == 100, "Total generated should be 100"
 
+    def test_counter_file_reloaded_with_stdlib_json_fallback(self, monkeypatch):
+        """Test that a counter saved with orjson is reloaded by the stdlib json fallback"""
+        import app.services.counter_manager as counter_manager_module
+        
+        counter_file = str(self.metadata_dir / f"{uuid.uuid4()}-counter.json")
+        counter_manager = CounterManager(persist_file=counter_file)
+        counter_manager.reset()
+        for i in range(50):
+            counter_manager.increment(7)
+        
+        monkeypatch.setattr(counter_manager_module, "orjson", None)
+        reloaded = CounterManager(persist_file=counter_file)
+        
+        assert reloaded.get(7) == 50, "Number 7 should be reloaded as 50"
+        assert reloaded.get_total() == 50, "Total generated should be reloaded as 50"
 
     def test_counter_file_created_from_games_list(self):
         """Test that counter file can be created from a list of games (simulating post-Excel creation)"""
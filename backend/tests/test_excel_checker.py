@@ -0,0 +1,34 @@
+"""
+Unit tests for Excel checker
+Checks generated workbooks (openpyxl and direct XML games sheets) against drawn numbers
+"""
+import pytest
+from app.services.excel_checker import ExcelChecker
+from app.services.excel_generator import ExcelGenerator
+from app.models.generation import GameConstraints
+
+
+class TestExcelChecker:
+    """Test Excel checker against generated files"""
+
+    @pytest.mark.parametrize("direct_xml_min_games", [100_000, 1])
+    def test_check_generated_file(self, monkeypatch, direct_xml_min_games):
+        """Test counting quadras/quinas/senas, ignoring the Acertos column"""
+        import app.services.excel_generator as excel_generator_module
+
+        monkeypatch.setattr(excel_generator_module, "DIRECT_XML_MIN_GAMES", direct_xml_min_games)
+        games = [
+            [1, 2, 3, 4, 50, 51],    # quadra
+            [1, 2, 3, 4, 5, 52],     # quina
+            [1, 2, 3, 4, 5, 6],      # sena
+            [1, 2, 3, 20, 21, 22]    # terno: its Acertos value (6) must not count as a 4th match
+        ]
+        # Manual numbers make the Acertos column hold integers next to the game numbers
+        excel_bytes = ExcelGenerator().generate_excel(
+            iter(games), GameConstraints(numbers_per_game=6), 24.0, len(games),
+            manual_numbers=[1, 2, 3, 20, 21, 22]
+        )
+
+        result = ExcelChecker().check_file(excel_bytes, [1, 2, 3, 4, 5, 6])
+
+        assert result == {"quadras": 1, "quinas": 1, "senas": 1, "total_games_checked": 4}
@@ -107,29 +107,498 @@ class TestExcelGeneratorBuffer:
         assert len(excel_bytes) > 0
     
     def test_write_batch_method(self):
-        """Test batch writing method"""
-        from openpyxl import Workbook
+        """Test batch writing in the streaming (write-only) games sheet"""
+        import io
+        from openpyxl import Workbook, load_workbook
         from app.services.excel_generator import ExcelGenerator
         
         generator = ExcelGenerator()
-        wb = Workbook()
-        ws = wb.create_sheet("Test")
+        wb = Workbook(write_only=True)
         
         games = [
-            [1, 2, 3, 4, 5, 6],
             [7, 8, 9, 10, 11, 12],
-            [13, 14, 15, 16, 17, 18]
+            [13, 14, 15, 16, 17, 18],
+            [1, 2, 3, 4, 5, 6]
         ]
         
-        generator._write_games_to_sheet_batch(
-            ws, games, 1, set(), 6
+        rows_written = generator._create_games_sheet_streaming(
+            wb, iter(games), [1, 8], len(games), 6
         )
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        ws = load_workbook(buffer)["Jogos Gerados"]
         
-        # Check that games were written
-        assert ws.cell(row=1, column=1).value == 1
-        assert ws.cell(row=2, column=1).value == 7
-        assert ws.cell(row=3, column=1).value == 13
+        # Check that games were written sorted, after title and headers, with matches highlighted
+        assert rows_written == 3
+        assert ws.cell(row=4, column=1).value == 1
+        assert ws.cell(row=5, column=1).value == 7
+        assert ws.cell(row=6, column=1).value == 13
+        assert [c.style for c in ws[4]] == ["game_cell_match"] + ["game_cell"] * 5 + ["game_cell_match"]
+        assert [c.style for c in ws[6]] == ["game_cell"] * 7
+        # With manual numbers the Acertos column holds the precomputed count, not a formula
+        assert [ws.cell(row=r, column=7).value for r in (4, 5, 6)] == [1, 1, 0]
 
+    def test_conditional_formatting_single_rule(self):
+        """Test that optional conditional formatting registers one rule over all number columns"""
+        import io
+        from openpyxl import Workbook, load_workbook
+
+        wb = Workbook(write_only=True)
+        games = [[1, 2, 3, 4, 5, 6], [7, 8, 9, 10, 11, 12]]
+        ExcelGenerator()._create_games_sheet_streaming(
+            wb, iter(games), [1, 8], len(games), 6, use_conditional_formatting=True
+        )
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        ws = load_workbook(buffer)["Jogos Gerados"]
+
+        formats = list(ws.conditional_formatting)
+        assert [str(cf.sqref) for cf in formats] == ["A4:F5"]
+        assert [rule.formula for rule in formats[0].rules] == [["COUNTIF('Entrada Manual'!$A$6:$F$6,A4)>0"]]
+
+    def test_packed_chunk_sort_roundtrip(self):
+        """Test that packed games sort lexicographically and unpack to the original numbers"""
+        import random
+        from app.services.excel_generator import _pack_games_chunk, _unpack_games
+
+        rng = random.Random(42)
+        for numbers_per_game in (6, 10):
+            games = [rng.sample(range(1, 61), numbers_per_game) for _ in range(500)]
+            unpacked = _unpack_games(_pack_games_chunk(games), numbers_per_game)
+            assert unpacked == sorted(sorted(game) for game in games)
+
+    def test_lexsort_chunk_sort_for_wide_games(self):
+        """Test that games too wide to pack are sorted by the int8 lexsort path"""
+        import random
+        import numpy as np
+        from app.services.excel_generator import _PACK_MAX_NUMBERS, _sort_games_chunk
+
+        rng = random.Random(3)
+        numbers_per_game = _PACK_MAX_NUMBERS + 5
+        games = [rng.sample(range(1, 61), numbers_per_game) for _ in range(500)]
+
+        sorted_chunk = _sort_games_chunk(games)
+
+        assert sorted_chunk.dtype == np.int8
+        assert sorted_chunk.shape == (500, numbers_per_game)
+        assert sorted_chunk.tolist() == sorted(sorted(game) for game in games)
+        # An int8 array slice is sorted the same way, without touching the caller's array
+        games_array = np.array(games, dtype=np.int8)
+        assert _sort_games_chunk(games_array).tolist() == sorted_chunk.tolist()
+        assert games_array.tolist() == games
+
+    @pytest.mark.parametrize("numbers_per_game", [6, 15])
+    def test_game_row_emitter_builds_row_cells(self, numbers_per_game):
+        """Test that the generated row emitter maps each number to its cell and appends the last cell"""
+        from app.services.excel_generator import _game_row_emitter
+
+        number_cells = [f"cell{number}" for number in range(61)]
+        game = list(range(60 - numbers_per_game + 1, 61))
+
+        emit_row = _game_row_emitter(numbers_per_game)
+
+        assert emit_row(game, number_cells, "count") == [f"cell{number}" for number in game] + ["count"]
+        assert _game_row_emitter(numbers_per_game) is emit_row
+
+    def test_game_chunks_from_iterator_and_array(self):
+        """Test that games are split into sort chunks from iterators and from array slices"""
+        import numpy as np
+        from app.services.excel_generator import _game_chunks
+
+        games = [[i, i + 1, i + 2, i + 3, i + 4, i + 5] for i in range(1, 11)]
+
+        chunks = list(_game_chunks(iter(games), 4))
+        array_chunks = list(_game_chunks(np.array(games, dtype=np.int8), 4))
+
+        assert chunks == [games[0:4], games[4:8], games[8:10]]
+        assert [chunk.tolist() for chunk in array_chunks] == chunks
+
+    @pytest.mark.parametrize("spill", [False, True])
+    def test_sorted_runs_merge_in_global_order(self, spill, monkeypatch):
+        """Test that runs kept in memory or spilled to disk merge into one sorted stream"""
+        import heapq
+        import random
+        from app.services.excel_generator import (
+            _SortedRuns, _pack_games_chunk, _sort_games_chunk, _unpack_games
+        )
+
+        monkeypatch.setattr(_SortedRuns, "_BLOCK_ROWS", 7)  # Force several reads per run
+        rng = random.Random(7)
+        games = [rng.sample(range(1, 61), 6) for _ in range(290)] + [[1, 2, 3, 4, 5, 6]] * 10
+        expected = sorted(sorted(game) for game in games)
+
+        packed_runs = _SortedRuns(spill=spill)
+        lexsorted_runs = _SortedRuns(spill=spill)
+        for start in range(0, len(games), 64):
+            chunk = games[start:start + 64]
+            packed_runs.add(packed_runs.sort_and_store(_pack_games_chunk, chunk))
+            lexsorted_runs.add(lexsorted_runs.sort_and_store(_sort_games_chunk, chunk))
+
+        assert _unpack_games(list(heapq.merge(*packed_runs.iterators())), 6) == expected
+        assert list(heapq.merge(*lexsorted_runs.iterators())) == expected
+        # Merged batches: packed runs merged block-wise in NumPy, wide games through heapq
+        for runs, unpack in ((packed_runs, lambda b: _unpack_games(b, 6)), (lexsorted_runs, list)):
+            batches = list(runs.merged_batches(50))
+            assert [len(batch) for batch in batches] == [50] * 6
+            assert [game for batch in batches for game in unpack(batch)] == expected
+        packed_runs.close()
+        lexsorted_runs.close()
+
+    def test_direct_xml_rows_match_openpyxl_rows(self, monkeypatch):
+        """Test that the direct XML games sheet matches the openpyxl one"""
+        import io
+        from openpyxl import load_workbook
+        import app.services.excel_generator as excel_generator_module
+        
+        games = [[(i * 7 + j * 11) % 60 + 1 for j in range(6)] for i in range(500)]
+        games = [sorted(set(g)) for g in games if len(set(g)) == 6]
+        constraints = GameConstraints(numbers_per_game=6)
+        
+        def games_sheet_rows(excel_bytes):
+            ws = load_workbook(io.BytesIO(excel_bytes))["Jogos Gerados"]
+            return [
+                [(c.value, c.fill.fgColor.rgb, c.font.b) for c in row]
+                for row in ws.iter_rows(min_row=3)
+            ]
+        
+        generator = ExcelGenerator()
+        openpyxl_bytes = generator.generate_excel(
+            iter(games), constraints, 600.0, len(games), manual_numbers=[1, 12, 23, 34, 45, 56]
+        )
+        
+        monkeypatch.setattr(excel_generator_module, "DIRECT_XML_MIN_GAMES", 100)
+        direct_bytes = generator.generate_excel(
+            iter(games), constraints, 600.0, len(games), manual_numbers=[1, 12, 23, 34, 45, 56]
+        )
+        
+        assert games_sheet_rows(direct_bytes) == games_sheet_rows(openpyxl_bytes)
+        # Game numbers stay numeric cells: no shared strings (text) in the games sheet
+        import zipfile
+        with zipfile.ZipFile(io.BytesIO(direct_bytes)) as package:
+            game_rows_xml = package.read("xl/worksheets/sheet2.xml").split(b'<row r="4">', 1)[1]
+        assert b' t="' not in game_rows_xml
+        assert all(isinstance(row[0][0], int) for row in games_sheet_rows(direct_bytes)[1:])
+    
+    def test_direct_xml_shared_formulas_match_openpyxl_formulas(self, monkeypatch):
+        """Test that the shared Acertos formulas of the direct XML sheet expand to the per-row formulas"""
+        import io
+        from openpyxl import load_workbook
+        import app.services.excel_generator as excel_generator_module
+        
+        games = [[(i * 7 + j * 11) % 60 + 1 for j in range(6)] for i in range(700)]
+        games = [sorted(set(g)) for g in games if len(set(g)) == 6]
+        constraints = GameConstraints(numbers_per_game=6)
+        
+        def games_sheet_rows(excel_bytes):
+            ws = load_workbook(io.BytesIO(excel_bytes))["Jogos Gerados"]
+            return [[c.value for c in row] for row in ws.iter_rows(min_row=4)]
+        
+        generator = ExcelGenerator()
+        openpyxl_bytes = generator.generate_excel(iter(games), constraints, 600.0, len(games))
+        
+        monkeypatch.setattr(excel_generator_module, "DIRECT_XML_MIN_GAMES", 100)
+        direct_bytes = generator.generate_excel(iter(games), constraints, 600.0, len(games))
+        
+        rows = games_sheet_rows(direct_bytes)
+        assert rows == games_sheet_rows(openpyxl_bytes)
+        assert rows[-1][6] == f"=SUMPRODUCT(COUNTIF('Entrada Manual'!$A$6:$F$6,A{len(rows) + 3}:F{len(rows) + 3}))"
+
+    def test_multiple_files_process_pool(self, monkeypatch):
+        """Test Ray-free parallel multi-file generation keeps file order and incremental saves"""
+        import io
+        from openpyxl import load_workbook
+        import app.services.excel_generator as excel_generator_module
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 50)
+        games = [[i % 50 + 1, 51, 52, 53, 54, 55 + i // 50] for i in range(120)]
+        constraints = GameConstraints(numbers_per_game=6)
+        saved = {}
+        
+        files = ExcelGenerator()._generate_multiple_excel_files_processes(
+            iter([games[:50], games[50:100], games[100:]]), constraints, 720.0, len(games), None,
+            lambda idx, data, meta: saved.__setitem__(idx, meta), 3
+        )
+        
+        assert len(files) == 3
+        assert sorted(saved) == [0, 1, 2]
+        assert saved[2]["games_in_file"] == 20 and saved[2]["end_index"] == 120
+        for file_idx, file_bytes in enumerate(files):
+            ws = load_workbook(io.BytesIO(file_bytes))["Jogos Gerados"]
+            assert ws.cell(row=4, column=6).value == 55 + file_idx
+
+    def test_multiple_files_process_pool_falls_back_when_submit_breaks(self, monkeypatch):
+        """Test that chunks already pulled from the iterator survive a pool broken at submit"""
+        from concurrent.futures import ThreadPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        import app.services.excel_generator as excel_generator_module
+        
+        class BreakingPool(ThreadPoolExecutor):
+            def __init__(self, max_workers, initializer):
+                super().__init__(max_workers=max_workers, initializer=initializer)
+                self.submitted = 0
+            
+            def submit(self, fn, *args):
+                if self.submitted:
+                    raise BrokenProcessPool("worker died")
+                self.submitted += 1
+                return super().submit(fn, *args)
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 50)
+        monkeypatch.setattr(excel_generator_module, "ProcessPoolExecutor", BreakingPool)
+        monkeypatch.setattr(excel_generator_module.os, "cpu_count", lambda: 2)
+        games = [[i % 50 + 1, 51, 52, 53, 54, 55 + i // 50] for i in range(120)]
+        saved = {}
+        
+        files = ExcelGenerator()._generate_multiple_excel_files_processes(
+            iter([games[:50], games[50:100], games[100:]]), GameConstraints(numbers_per_game=6),
+            720.0, len(games), None, lambda idx, data, meta: saved.__setitem__(idx, meta["games_in_file"]), 3
+        )
+        
+        assert len(files) == 3
+        assert saved == {0: 50, 1: 50, 2: 20}
+
+    def test_multiple_files_process_pool_propagates_main_process_errors(self, monkeypatch):
+        """Test that a failed main-process regeneration raises instead of dropping the file"""
+        from concurrent.futures import Future, ThreadPoolExecutor
+        import app.services.excel_generator as excel_generator_module
+        
+        class FailingWorkerPool(ThreadPoolExecutor):
+            def __init__(self, max_workers, initializer):
+                super().__init__(max_workers=max_workers)
+            
+            def submit(self, fn, *args):
+                future = Future()
+                future.set_exception(RuntimeError("worker crashed"))
+                return future
+        
+        calls = []
+        
+        def disk_full_once(self, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError(28, "No space left on device")
+            return b"excel"
+        
+        monkeypatch.setattr(excel_generator_module, "ProcessPoolExecutor", FailingWorkerPool)
+        monkeypatch.setattr(excel_generator_module.os, "cpu_count", lambda: 2)
+        # Only the first regeneration fails: it must not be mistaken for a broken pool and skipped
+        monkeypatch.setattr(ExcelGenerator, "_generate_single_excel_file", disk_full_once)
+        games = [[1, 2, 3, 4, 5, 6 + i] for i in range(3)]
+        
+        with pytest.raises(OSError):
+            ExcelGenerator()._generate_multiple_excel_files_processes(
+                iter([games[:1], games[1:2], games[2:]]), GameConstraints(numbers_per_game=6),
+                18.0, len(games), None, None, 3
+            )
+
+    def test_multiple_files_use_direct_xml_rows(self, monkeypatch):
+        """Test that each file of a multi-file export gets its games sheet through direct XML"""
+        import io
+        from openpyxl import load_workbook
+        import app.services.excel_generator as excel_generator_module
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 200)
+        monkeypatch.setattr(excel_generator_module, "DIRECT_XML_MIN_GAMES", 100)
+        injected = []
+        original_inject = ExcelGenerator._inject_games_rows_xml
+        
+        def spy_inject(self, *args, **kwargs):
+            injected.append(args[3])
+            return original_inject(self, *args, **kwargs)
+        
+        monkeypatch.setattr(ExcelGenerator, "_inject_games_rows_xml", spy_inject)
+        games = [[(i * 7 + j * 11) % 60 + 1 for j in range(6)] for i in range(400)]
+        games = [sorted(g) for g in games if len(set(g)) == 6][:350]
+        
+        file_bytes = ExcelGenerator()._generate_single_excel_file(
+            games[:200], 0, 2, GameConstraints(numbers_per_game=6), 2100.0, 350, None
+        )
+        
+        assert injected == [203]
+        ws = load_workbook(io.BytesIO(file_bytes))["Jogos Gerados"]
+        rows = [[c.value for c in row[:6]] for row in ws.iter_rows(min_row=4)]
+        assert rows == sorted(games[:200])
+
+    def test_multiple_files_from_iterator(self, monkeypatch):
+        """Test that a games iterator is split into files without materializing it first"""
+        import app.services.excel_generator as excel_generator_module
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 40)
+        monkeypatch.setattr(excel_generator_module.os, "cpu_count", lambda: 1)
+        consumed = []
+        
+        def games_iterator() -> Iterator[List[int]]:
+            for i in range(100):
+                consumed.append(i)
+                yield [1, 2, 3, 4, 5, 6 + i % 50]
+        
+        saved = []
+        files = ExcelGenerator().generate_excel(
+            games_iterator(), GameConstraints(numbers_per_game=6), 600.0, 100,
+            save_callback=lambda idx, data, meta: saved.append((idx, len(consumed), meta["games_in_file"]))
+        )
+        
+        assert len(files) == 3
+        # Each file is built (and saved) before the next chunk is pulled from the iterator
+        assert saved == [(0, 40, 40), (1, 80, 40), (2, 100, 20)]
+
+    def test_valid_numbers_cache_follows_historical_reload(self, monkeypatch):
+        """Test that the dropdown formula is cached per historical data load"""
+        from datetime import datetime
+        from app.services import excel_generator as excel_generator_module
+        
+        service = excel_generator_module.historical_data_service
+        calls = []
+        monkeypatch.setattr(service, "get_all_numbers", lambda: calls.append(1) or [3, 1, 2])
+        excel_generator_module._valid_numbers_cached.cache_clear()
+        
+        loaded_at = datetime(2024, 1, 1)
+        assert excel_generator_module._valid_numbers_cached(loaded_at) == ((3, 1, 2), '"3,1,2"')
+        excel_generator_module._valid_numbers_cached(loaded_at)
+        assert len(calls) == 1
+        excel_generator_module._valid_numbers_cached(datetime(2024, 1, 2))
+        assert len(calls) == 2
+        excel_generator_module._valid_numbers_cached.cache_clear()
+
+    def test_multiple_files_ray_keeps_file_order(self, monkeypatch):
+        """Test that Ray multi-file generation maps each completed future back to its file"""
+        ray = pytest.importorskip("ray")
+        import app.services.excel_generator as excel_generator_module
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 30)
+        ray.init(ignore_reinit_error=True, num_cpus=2)
+        games = [[1, 2, 3, 4, 5, 6 + i // 30] for i in range(150)]
+        saved = []
+        
+        files = ExcelGenerator()._generate_multiple_excel_files_ray(
+            [games[i:i + 30] for i in range(0, 150, 30)], GameConstraints(numbers_per_game=6),
+            900.0, 150, None, lambda idx, data, meta: saved.append((idx, meta["start_index"])), 5
+        )
+        
+        assert len(files) == 5
+        assert sorted(saved) == [(i, i * 30 + 1) for i in range(5)]
+
+    def test_multiple_files_saved_by_callback_are_returned_as_paths(self, monkeypatch, tmp_path):
+        """Test that files saved by save_callback are not kept in memory, only their paths"""
+        import app.services.excel_generator as excel_generator_module
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 40)
+        monkeypatch.setattr(excel_generator_module.os, "cpu_count", lambda: 1)
+        
+        def save_to_disk(file_idx, file_bytes, file_metadata):
+            file_path = tmp_path / f"part{file_idx + 1}.xlsx"
+            file_path.write_bytes(file_bytes)
+            return str(file_path)
+        
+        games = [[1, 2, 3, 4, 5, 6 + i % 50] for i in range(100)]
+        files = ExcelGenerator().generate_excel(
+            iter(games), GameConstraints(numbers_per_game=6), 600.0, 100, save_callback=save_to_disk
+        )
+        
+        assert files == [str(tmp_path / f"part{i}.xlsx") for i in (1, 2, 3)]
+
+    def test_int8_array_input_matches_list_input(self, monkeypatch):
+        """Test that an int8 (N, k) games array yields the same files as the list of games"""
+        import io
+        import numpy as np
+        from openpyxl import load_workbook
+        import app.services.excel_generator as excel_generator_module
+        
+        monkeypatch.setattr(excel_generator_module, "EXCEL_MAX_GAMES_PER_FILE", 60)
+        monkeypatch.setattr(excel_generator_module.os, "cpu_count", lambda: 1)
+        games = [[(i * 7 + j * 11) % 60 + 1 for j in range(6)] for i in range(300)]
+        games = [g for g in games if len(set(g)) == 6][:150]
+        constraints = GameConstraints(numbers_per_game=6)
+        
+        def games_rows(files):
+            return [
+                [[c.value for c in row] for row in load_workbook(io.BytesIO(f))["Jogos Gerados"].iter_rows(min_row=4)]
+                for f in files
+            ]
+        
+        generator = ExcelGenerator()
+        list_files = generator.generate_excel(games, constraints, 900.0, len(games), [1, 12, 23])
+        array_files = generator.generate_excel(
+            np.array(games, dtype=np.int8), constraints, 900.0, len(games), [1, 12, 23]
+        )
+        
+        assert len(array_files) == 3
+        assert games_rows(array_files) == games_rows(list_files)
+
+    @pytest.mark.parametrize("direct_xml_min_games", [100_000, 1])
+    def test_generate_excel_file_writes_to_path(self, monkeypatch, tmp_path, direct_xml_min_games):
+        """Test that a single file written straight to disk matches the in-memory workbook"""
+        import io
+        from openpyxl import load_workbook
+        import app.services.excel_generator as excel_generator_module
+
+        monkeypatch.setattr(excel_generator_module, "DIRECT_XML_MIN_GAMES", direct_xml_min_games)
+        games = [[7, 8, 9, 10, 11, 12], [1, 2, 3, 4, 5, 6]]
+        constraints = GameConstraints(numbers_per_game=6)
+        output_path = tmp_path / "games.xlsx"
+
+        file_size = ExcelGenerator().generate_excel_file(games, constraints, 12.0, 2, [1, 8], output_path)
+        excel_bytes = ExcelGenerator().generate_excel(games, constraints, 12.0, 2, [1, 8])
+
+        assert file_size == output_path.stat().st_size
+        on_disk = load_workbook(output_path)["Jogos Gerados"]
+        in_memory = load_workbook(io.BytesIO(excel_bytes))["Jogos Gerados"]
+        assert [list(r) for r in on_disk.iter_rows(values_only=True)] == [
+            list(r) for r in in_memory.iter_rows(values_only=True)
+        ]
+
+    def test_csv_sidecar_holds_sorted_games(self):
+        """Test that csv_sidecar writes the sorted games and acertos to a gzipped CSV"""
+        import csv
+        import gzip
+        import io
+        from openpyxl import load_workbook
+        
+        games = [[7, 8, 9, 10, 11, 12], [1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 7]]
+        xlsx_bytes, csv_bytes = ExcelGenerator().generate_excel(
+            iter(games), GameConstraints(numbers_per_game=6), 18.0, 3,
+            manual_numbers=[1, 7, 12], csv_sidecar=True
+        )
+        
+        rows = list(csv.reader(io.StringIO(gzip.decompress(csv_bytes).decode("utf-8"))))
+        assert rows[0] == ["Número 1", "Número 2", "Número 3", "Número 4", "Número 5", "Número 6", "Acertos"]
+        assert rows[1:] == [
+            ["1", "2", "3", "4", "5", "6", "1"],
+            ["1", "2", "3", "4", "5", "7", "2"],
+            ["7", "8", "9", "10", "11", "12", "2"],
+        ]
+        wb = load_workbook(io.BytesIO(xlsx_bytes))
+        assert wb.sheetnames[:2] == ["Entrada Manual", "Jogos Gerados"]
+        assert wb["Jogos Gerados"].max_row == 4
+
+    def test_validation_summary_counts_acertos_column(self):
+        """Test that the COUNTIF summary points at the Acertos column for any numbers_per_game"""
+        import io
+        from openpyxl import load_workbook
+        
+        games = [list(range(1, 11)), list(range(11, 21))]
+        excel_bytes = ExcelGenerator().generate_excel(
+            iter(games), GameConstraints(numbers_per_game=10), 100.0, 2
+        )
+        wb = load_workbook(io.BytesIO(excel_bytes))
+        
+        assert wb["Jogos Gerados"]["K3"].value == "Acertos"
+        assert [r.coord for r in wb["Jogos Gerados"].merged_cells.ranges] == ["A1:J1"]
+        assert wb["Entrada Manual"]["B9"].value == "=COUNTIF('Jogos Gerados'!K4:K5,4)"
+
+
+    def test_frozen_gc_unfreezes_only_after_last_writer(self):
+        """Test that overlapping writers share one gc.freeze until the last one exits"""
+        import gc
+        from app.services.excel_generator import _frozen_gc
+        
+        first, second = _frozen_gc(), _frozen_gc()
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        assert gc.get_freeze_count() > 0
+        second.__exit__(None, None, None)
+        assert gc.get_freeze_count() == 0
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,275 @@
+"""
+Unit tests for FileManager
+Listing and counting are served from the append-only metadata index
+"""
+import json
+import pytest
+from datetime import datetime
+import app.services.file_manager as file_manager_module
+from app.services.file_manager import FileManager, INDEX_FILENAME
+
+
+class TestFileManagerIndex:
+    """Test the metadata index behind list_files/get_total_count"""
+
+    def test_save_list_and_delete(self, tmp_path):
+        """Test that saved files are listed newest first and deletions are tombstoned"""
+        manager = FileManager(base_dir=tmp_path)
+        manager.save_file("aaaa1111", b"first", {"created_at": "2026-01-01T00:00:00"})
+        manager.save_file("bbbb2222", b"second", {"created_at": "2026-01-02T00:00:00"})
+
+        assert [f["process_id"] for f in manager.list_files()] == ["bbbb2222", "aaaa1111"]
+        assert manager.get_total_count() == 2
+
+        assert manager.delete_file("aaaa1111")
+        assert [f["process_id"] for f in manager.list_files()] == ["bbbb2222"]
+        assert manager.get_total_count() == 1
+        index_lines = (tmp_path / "storage" / "metadata" / INDEX_FILENAME).read_text().splitlines()
+        assert json.loads(index_lines[-1]) == {"process_id": "aaaa1111", "deleted": True}
+        # The metadata file stays indented JSON and holds the same record as its index line
+        metadata_text = (tmp_path / "storage" / "metadata" / "bbbb2222.json").read_text()
+        assert metadata_text.startswith("{\n  ")
+        assert json.loads(metadata_text) in [json.loads(line) for line in index_lines]
+
+    def test_list_files_paginates_index_listing(self, tmp_path):
+        """Test that limit/offset slice the index listing without reading other metadata files"""
+        manager = FileManager(base_dir=tmp_path)
+        for day in range(1, 6):
+            manager.save_file(f"page000{day}", b"x", {"created_at": f"2026-01-0{day}T00:00:00"})
+        (tmp_path / "storage" / "metadata" / "page0001.json").unlink()
+
+        assert [f["process_id"] for f in manager.list_files(limit=2, offset=1)] == ["page0004", "page0003"]
+        assert [f["process_id"] for f in manager.list_files(limit=2, offset=4)] == ["page0001"]
+
+    def test_multi_part_files_grouped_from_index(self, tmp_path):
+        """Test that part files are folded into their main entry"""
+        manager = FileManager(base_dir=tmp_path)
+        manager.save_file("main0001-part1", b"p1", {})
+        manager.save_file("main0001-part2", b"p22", {})
+        manager.save_file("main0001", b"p1", {
+            "is_multi_file": True, "file_parts": ["main0001-part1", "main0001-part2.json"]
+        })
+
+        files = manager.list_files()
+
+        assert [f["process_id"] for f in files] == ["main0001"]
+        assert files[0]["total_files"] == 2
+        assert files[0]["file_size"] == 5
+        assert manager.get_total_count() == 1
+        assert [p["process_id"] for p in manager.get_all_file_parts("main0001")] == ["main0001-part1", "main0001-part2"]
+        assert len(manager.get_file_paths_for_check("main0001")) == 2
+
+    def test_part_ids_follow_part_suffix_convention(self):
+        """Test that only '{main}-partN' ids are treated as parts of a multi-file entry"""
+        from app.services.file_manager import _is_part_id
+
+        assert _is_part_id("main0001-part1")
+        assert _is_part_id("main0001-part12")
+        assert not _is_part_id("main0001")
+        assert not _is_part_id("main-partial0001")
+        assert not _is_part_id("-part1")
+
+    def test_missing_files_pruned_and_index_compacted(self, tmp_path, monkeypatch):
+        """Test that files removed from disk are pruned when looked up and tombstones trigger compaction"""
+        monkeypatch.setattr(file_manager_module, "INDEX_COMPACT_MIN_TOMBSTONES", 2)
+        manager = FileManager(base_dir=tmp_path)
+        paths = [manager.save_file(f"proc{i:04d}", b"x", {}) for i in range(3)]
+        for path in paths[:2]:
+            (tmp_path / path).unlink()
+
+        # The listing trusts the index; the missing files are pruned when their path is requested
+        assert len(manager.list_files()) == 3
+        assert manager.get_file_path("proc0000") is None
+        assert manager.get_file_path("proc0001") is None
+        assert str(manager.get_file_path("proc0002")) == paths[2]
+
+        assert [f["process_id"] for f in manager.list_files()] == ["proc0002"]
+        index_lines = (tmp_path / "storage" / "metadata" / INDEX_FILENAME).read_text().splitlines()
+        assert [json.loads(line)["process_id"] for line in index_lines] == ["proc0002"]
+        assert not (tmp_path / "storage" / "metadata" / "proc0000.json").exists()
+
+    def test_index_rebuilt_from_existing_metadata(self, tmp_path):
+        """Test that storages without an index are migrated from the per-file JSON metadata"""
+        manager = FileManager(base_dir=tmp_path)
+        manager.save_file("old00001", b"old", {})
+        (tmp_path / "storage" / "metadata" / INDEX_FILENAME).unlink()
+        # Counter files share the metadata directory and must not be indexed
+        (tmp_path / "storage" / "metadata" / "old00001-counter.json").write_text('{"counter": 3}')
+
+        assert [f["process_id"] for f in FileManager(base_dir=tmp_path).list_files()] == ["old00001"]
+        assert FileManager(base_dir=tmp_path).get_total_count() == 1
+
+    def test_index_rebuilt_in_parallel_for_many_files(self, tmp_path, monkeypatch):
+        """Test that a rebuild above the parallel threshold indexes every metadata file"""
+        monkeypatch.setattr(file_manager_module, "INDEX_REBUILD_PARALLEL_MIN_FILES", 4)
+        manager = FileManager(base_dir=tmp_path)
+        for i in range(20):
+            manager.save_file(f"par{i:05d}", b"x" * i, {})
+        (tmp_path / "storage" / "metadata" / INDEX_FILENAME).unlink()
+        (tmp_path / "storage" / "metadata" / "broken01.json").write_text("{")
+
+        files = FileManager(base_dir=tmp_path).list_files()
+
+        assert sorted(f["process_id"] for f in files) == [f"par{i:05d}" for i in range(20)]
+        assert sum(f["file_size"] for f in files) == sum(range(20))
+
+    def test_index_rebuild_skips_counter_files_by_name(self, tmp_path, monkeypatch):
+        """Test that counter files are recognized by name and never parsed during a rebuild"""
+        manager = FileManager(base_dir=tmp_path)
+        metadata_dir = tmp_path / "storage" / "metadata"
+        (metadata_dir / "new00001-counter.json").write_text("not json")
+        parsed = []
+        original_loads = file_manager_module._json_loads
+        monkeypatch.setattr(file_manager_module, "_json_loads", lambda data: parsed.append(data) or original_loads(data))
+
+        manager._rebuild_index()
+
+        assert parsed == []
+
+    def test_listing_cached_until_index_changes(self, tmp_path, monkeypatch):
+        """Test that repeated listings reuse the parsed index until a save invalidates it"""
+        manager = FileManager(base_dir=tmp_path)
+        manager.save_file("cache001", b"x", {})
+        manager.list_files()
+
+        reads = []
+        original_read_index = manager._read_index
+        monkeypatch.setattr(manager, "_read_index", lambda: reads.append(1) or original_read_index())
+
+        manager.list_files()
+        manager.get_total_count()
+        assert reads == []
+
+        manager.save_file("cache002", b"y", {})
+        assert manager.get_total_count() == 2
+        assert reads == [1]
+
+    def test_file_metadata_cached_until_file_changes(self, tmp_path, monkeypatch):
+        """Test that metadata is parsed once per version of its JSON file"""
+        manager = FileManager(base_dir=tmp_path)
+        manager.save_file("meta0001", b"x", {"label": "first"})
+
+        loads = []
+        original_loads = file_manager_module._json_loads
+        monkeypatch.setattr(file_manager_module, "_json_loads", lambda data: loads.append(1) or original_loads(data))
+
+        assert manager.get_file_metadata("meta0001")["label"] == "first"
+        assert manager.get_file_metadata("meta0001")["label"] == "first"
+        assert loads == [1]
+
+        manager.save_file("meta0001", b"y", {"label": "second"})
+        assert manager.get_file_metadata("meta0001")["label"] == "second"
+        assert manager.delete_file("meta0001")
+        assert manager.get_file_metadata("meta0001") is None
+
+    def test_delete_uses_cached_metadata(self, tmp_path, monkeypatch):
+        """Test that deleting a file whose metadata was already read does not parse it again"""
+        manager = FileManager(base_dir=tmp_path)
+        saved_path = manager.save_file("del00001", b"x", {})
+        manager.get_file_metadata("del00001")
+
+        monkeypatch.setattr(file_manager_module, "_json_loads", lambda data: pytest.fail("metadata parsed again"))
+
+        assert manager.delete_file("del00001")
+        assert not (tmp_path / saved_path).exists()
+        assert not (tmp_path / "storage" / "metadata" / "del00001.json").exists()
+
+    def test_concurrent_saves_listings_and_deletes(self, tmp_path, monkeypatch):
+        """Test that the shared manager keeps a consistent index under concurrent use"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        monkeypatch.setattr(file_manager_module, "INDEX_COMPACT_MIN_TOMBSTONES", 4)
+        manager = FileManager(base_dir=tmp_path)
+
+        def worker(worker_id):
+            for i in range(10):
+                manager.save_file(f"w{worker_id}-{i:04d}", b"x", {})
+                manager.list_files()
+                if i % 2:
+                    assert manager.delete_file(f"w{worker_id}-{i - 1:04d}")
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(worker, range(4)))
+
+        expected = {f"w{w}-{i:04d}" for w in range(4) for i in range(1, 10, 2)}
+        assert {f["process_id"] for f in manager.list_files()} == expected
+        assert {f["process_id"] for f in FileManager(base_dir=tmp_path).list_files()} == expected
+
+    def test_delete_when_data_file_already_removed(self, tmp_path):
+        """Test that deleting an entry whose data file is already gone still removes its metadata"""
+        manager = FileManager(base_dir=tmp_path)
+        (tmp_path / manager.save_file("gone0001", b"x", {})).unlink()
+
+        assert manager.delete_file("gone0001")
+        assert manager.get_file_metadata("gone0001") is None
+        assert manager.list_files() == []
+
+    def test_index_read_incrementally_after_appends(self, tmp_path, monkeypatch):
+        """Test that only records appended since the last read are parsed, until the index is replaced"""
+        monkeypatch.setattr(file_manager_module, "INDEX_COMPACT_MIN_TOMBSTONES", 4)
+        manager = FileManager(base_dir=tmp_path)
+        for i in range(5):
+            manager.save_file(f"inc{i:05d}", b"x", {})
+        manager.list_files()
+
+        parsed = []
+        original_loads = file_manager_module._json_loads
+        monkeypatch.setattr(file_manager_module, "_json_loads", lambda data: parsed.append(data) or original_loads(data))
+
+        manager.save_file("inc00005", b"y", {})
+        assert len(manager.list_files()) == 6
+        assert len(parsed) == 1
+
+        # Deletes past the threshold compact (replace) the index: the next read starts over
+        manager.delete_file("inc00000")
+        manager.delete_file("inc00001")
+        parsed.clear()
+        assert [f["process_id"] for f in manager.list_files()] == [f"inc{i:05d}" for i in range(5, 1, -1)]
+        assert len(parsed) == 4
+
+    def test_stdlib_json_fallback_reads_orjson_index(self, tmp_path, monkeypatch):
+        """Test that both JSON backends write and read the same metadata"""
+        manager = FileManager(base_dir=tmp_path)
+        manager.save_file("json0001", b"x", {"label": "Análise"})
+
+        monkeypatch.setattr(file_manager_module, "orjson", None)
+        fallback_manager = FileManager(base_dir=tmp_path)
+        fallback_manager.save_file("json0002", b"y", {"label": "Ação"})
+
+        assert sorted(f["label"] for f in fallback_manager.list_files()) == ["Análise", "Ação"]
+        assert fallback_manager.get_file_metadata("json0001")["label"] == "Análise"
+        metadata_text = (tmp_path / "storage" / "metadata" / "json0002.json").read_text(encoding="utf-8")
+        assert '"label": "Ação"' in metadata_text
+
+    def test_save_file_copies_path_and_stream_sources(self, tmp_path):
+        """Test that save_file accepts a file on disk or a binary stream besides bytes"""
+        import io
+
+        manager = FileManager(base_dir=tmp_path)
+        source_file = tmp_path / "source.xlsx"
+        source_file.write_bytes(b"from-disk")
+
+        path_saved = manager.save_file("src00001", source_file, {})
+        stream_saved = manager.save_file("src00002", io.BytesIO(b"from-stream"), {})
+
+        assert source_file.exists()
+        assert open(path_saved, "rb").read() == b"from-disk"
+        assert open(stream_saved, "rb").read() == b"from-stream"
+        assert manager.get_file_metadata("src00002")["file_size"] == 11
+
+    def test_save_file_from_path_moves_temp_file(self, tmp_path):
+        """Test that a file written to a temp path is published by rename with its size"""
+        manager = FileManager(base_dir=tmp_path)
+        tmp_file = manager.create_temp_path()
+        tmp_file.write_bytes(b"xlsx-bytes")
+
+        saved_path = manager.save_file_from_path("path0001", tmp_file, {})
+
+        assert not tmp_file.exists()
+        assert open(saved_path, "rb").read() == b"xlsx-bytes"
+        metadata = manager.get_file_metadata("path0001")
+        assert metadata["file_size"] == 10
+        # Filename timestamp and created_at come from the same instant
+        created_at = datetime.fromisoformat(metadata["created_at"])
+        assert metadata["filename"] == f"mega-sena-path0001-{created_at.strftime('%Y%m%d-%H%M%S')}.xlsx"
+        assert list((tmp_path / "storage" / "excel_files").glob("*.tmp")) == []
@@ -0,0 +1,230 @@
+"""
+Unit tests for GameBalancer
+Distribution analysis runs over the (N, k) games matrix
+"""
+import logging
+import numpy as np
+from app.models.generation import GameConstraints
+from app.services.game_validator import TernosDuplasCache
+from app.services.game_balancer import GameBalancer, _games_to_array, _append_game, _force_first_number, _log_top_numbers, _pack_game, _pack_games
+
+
+def _sample_games():
+    """Six-number games with distinct pairs, one per first number 1..10"""
+    return [[first, first + 10, first + 20, first + 30, first + 40, first + 50] for first in range(1, 11)]
+
+
+class TestGameBalancerDistribution:
+    """Test the vectorized first-number distribution"""
+
+    def test_games_to_array(self):
+        """Test that games become an int8 (N, k) matrix"""
+        games_array = _games_to_array([[5, 1, 9], [2, 3, 4]], 3)
+        assert games_array.dtype == np.int8
+        assert games_array.tolist() == [[5, 1, 9], [2, 3, 4]]
+
+    def test_append_game_grows_buffer(self):
+        """Test that appending past the preallocated rows doubles the buffer and keeps the rows"""
+        games_buffer = np.empty((1, 3), dtype=np.int8)
+        games_buffer = _append_game(games_buffer, 0, [1, 2, 3])
+        grown = _append_game(games_buffer, 1, [4, 5, 6])
+        assert grown.shape == (2, 3)
+        assert grown.tolist() == [[1, 2, 3], [4, 5, 6]]
+        assert _append_game(grown, 0, [7, 8, 9]) is grown
+
+    def test_analyze_distribution_counts_minimum(self):
+        """Test that the first number of each game is its minimum, even unsorted"""
+        games = [[30, 7, 12], [7, 50, 60], [1, 2, 3], [60, 59, 58]]
+        distribution = GameBalancer()._analyze_distribution(_games_to_array(games, 3).min(axis=1))
+        assert set(distribution) == set(range(1, 61))
+        assert distribution[7] == 2
+        assert distribution[1] == 1
+        assert distribution[58] == 1
+        assert sum(distribution.values()) == 4
+
+    def test_pack_game_is_order_independent(self):
+        """Test that packed keys ignore order and match the vectorized packing"""
+        games = [[60, 1, 33, 7, 12, 45], [1, 7, 12, 33, 45, 60], [1, 7, 12, 33, 45, 59]]
+        keys = _pack_games(_games_to_array(games, 6)).tolist()
+        assert keys == [_pack_game(game) for game in games]
+        assert keys[0] == keys[1] != keys[2]
+        assert _pack_game([60]) == 1 << 59
+
+    def test_log_top_numbers_orders_by_count(self, caplog):
+        """Test that only the most frequent numbers are logged, highest count first"""
+        games_array = _games_to_array([[1, 2, 3], [1, 2, 4], [1, 5, 6]], 3)
+        with caplog.at_level(logging.INFO, logger="app.services.game_balancer"):
+            _log_top_numbers(games_array, top=2)
+        assert [record.getMessage() for record in caplog.records] == [
+            "  Número 1: 3 ocorrências (33.33%)",
+            "  Número 2: 2 ocorrências (22.22%)",
+        ]
+
+    def test_balance_skips_malformed_games(self, monkeypatch):
+        """Test that empty or wrong-sized games are dropped before balancing"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        target = {num: (1 if num <= 10 else 0) for num in range(1, 61)}
+        monkeypatch.setattr(balancer, "_get_target_distribution", lambda total: target)
+
+        balanced = balancer.balance_games(games + [[], [1, 2, 3]], len(games), GameConstraints(numbers_per_game=6))
+
+        assert sorted(map(sorted, balanced)) == sorted(map(sorted, games))
+
+    def test_balance_removes_excess_first_numbers(self, monkeypatch):
+        """Test that over-represented first numbers are trimmed down to the target"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        extras = [[1, 12, 23, 34, 45, 56], [1, 13, 24, 35, 46, 57], [1, 14, 25, 36, 47, 58]]
+        target = {num: (1 if num <= 10 else 0) for num in range(1, 61)}
+        monkeypatch.setattr(balancer, "_get_target_distribution", lambda total: target)
+
+        balanced = balancer.balance_games(games + extras, len(games), GameConstraints(numbers_per_game=6))
+
+        assert len(balanced) == len(games)
+        assert sorted(min(game) for game in balanced) == list(range(1, 11))
+        assert all(game in balanced for game in games[1:])
+
+    def test_balance_within_tolerance_skips_adjustments(self, monkeypatch):
+        """Test that a distribution close to the target goes straight to final validation"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        extra = [1, 12, 23, 34, 45, 56]
+        target = {num: (1 if num <= 10 else 0) for num in range(1, 61)}
+        monkeypatch.setattr(balancer, "_get_target_distribution", lambda total: target)
+        def fail_adjustments(*args):
+            raise AssertionError("adjustments should be skipped")
+        monkeypatch.setattr(balancer, "_calculate_adjustments", fail_adjustments)
+        monkeypatch.setattr(balancer, "_apply_adjustments", fail_adjustments)
+
+        balanced = balancer.balance_games(games + [extra], len(games), GameConstraints(numbers_per_game=6))
+
+        assert balanced == games
+
+    def test_generated_game_validated_once(self, monkeypatch):
+        """Test that an accepted mutated game goes through ternos/duplas validation a single time"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        target = {num: (1 if num <= 11 else 0) for num in range(1, 61)}
+        monkeypatch.setattr(balancer, "_get_target_distribution", lambda total: target)
+        validated = []
+        original_validate = TernosDuplasCache.validate_game
+        def spy_validate(cache, game, *args):
+            validated.append(tuple(sorted(game)))
+            return original_validate(cache, game, *args)
+        monkeypatch.setattr(TernosDuplasCache, "validate_game", spy_validate)
+
+        balanced = balancer.balance_games(games, len(games) + 1, GameConstraints(numbers_per_game=6))
+
+        generated = [game for game in balanced if game not in games]
+        assert len(generated) == 1
+        assert validated.count(tuple(sorted(generated[0]))) == 1
+
+    def test_final_validation_skips_generated_games(self, monkeypatch):
+        """Test that games validated while generating are not validated again"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        generated = [11, 12, 22, 32, 42, 52]
+        monkeypatch.setattr(
+            balancer, "_apply_adjustments",
+            lambda *args: (_games_to_array(games + [generated], 6), {_pack_game(generated)})
+        )
+        validated = []
+        original_validate = TernosDuplasCache.validate_game
+        def spy_validate(cache, game):
+            validated.append(list(game))
+            return original_validate(cache, game)
+        monkeypatch.setattr(TernosDuplasCache, "validate_game", spy_validate)
+
+        balanced = balancer.balance_games(games, len(games) + 1, GameConstraints(numbers_per_game=6))
+
+        assert balanced == games + [generated]
+        assert validated == games
+
+    def test_final_validation_drops_duplicates_in_order(self, monkeypatch):
+        """Test that repeated games (in any order) keep only their first occurrence"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        shuffled_repeat = list(reversed(games[0]))
+        monkeypatch.setattr(
+            balancer, "_apply_adjustments",
+            lambda *args: (_games_to_array(games[:5] + [shuffled_repeat] + games[5:] + [games[3]], 6), set())
+        )
+        monkeypatch.setattr(balancer, "_generator", None)
+
+        balanced = balancer.balance_games(games, len(games), GameConstraints(numbers_per_game=6))
+
+        assert balanced == games
+
+
+    def test_final_validation_without_ternos_cache(self, monkeypatch):
+        """Test that with fixed numbers (no ternos/duplas cache) only duplicates are dropped"""
+        balancer = GameBalancer()
+        games = [[1, first, first + 10, first + 20, first + 30, first + 40] for first in range(2, 12)]
+        monkeypatch.setattr(balancer, "_apply_adjustments", lambda *args: (_games_to_array(games + games[:2], 6), set()))
+        monkeypatch.setattr(balancer, "_generator", None)
+
+        balanced = balancer.balance_games(games, len(games), GameConstraints(numbers_per_game=6, fixed_numbers=[1]))
+
+        assert balanced == games
+
+
+class TestGameBalancerMutation:
+    """Test the vectorized mutation candidates"""
+
+    def test_force_first_number_filters_candidates(self):
+        """Test which candidate rows can take the target as their first number"""
+        candidates = np.array([
+            [12, 3, 20],  # alvo 5 ausente e menor que o segundo menor: 3 vira 5
+            [5, 30, 40],  # alvo já é o menor número
+            [3, 4, 30],   # alvo maior que o segundo menor número
+            [3, 5, 30],   # alvo presente, mas não é o menor número
+            [7, 7, 30],   # números repetidos
+        ])
+        assert _force_first_number(candidates, 5).tolist() == [[5, 12, 20], [5, 30, 40]]
+
+    def test_mutate_game_forces_target_first_number(self, monkeypatch):
+        """Test that a mutated game is shifted into range and starts at the target number"""
+        balancer = GameBalancer()
+        # Isola do histórico carregado por outros testes (regra dos últimos sorteios)
+        monkeypatch.setattr(balancer._validator, "validate_basic", lambda *args, **kwargs: True)
+        rng = np.random.RandomState(7)
+        base_game = np.array([10, 20, 30, 40, 50, 59], dtype=np.int8)
+
+        mutated = balancer._mutate_game_to_region(
+            base_game, 9, [], rng, GameConstraints(numbers_per_game=6), [], set(), None
+        )
+
+        assert mutated is not None
+        assert mutated == sorted(mutated)
+        assert mutated[0] == 9
+        assert len(set(mutated)) == 6 and all(1 <= num <= 60 for num in mutated)
+
+    def test_balance_generates_missing_first_numbers(self, monkeypatch):
+        """Test that under-represented first numbers are filled by mutating existing games"""
+        balancer = GameBalancer()
+        games = _sample_games()
+        target = {num: (1 if num <= 11 else 0) for num in range(1, 61)}
+        monkeypatch.setattr(balancer, "_get_target_distribution", lambda total: target)
+
+        balanced = balancer.balance_games(games, len(games) + 1, GameConstraints(numbers_per_game=6))
+
+        assert len(balanced) == len(games) + 1
+        assert all(game in balanced for game in games)
+        assert any(min(game) == 11 for game in balanced)
+        assert len({tuple(sorted(game)) for game in balanced}) == len(balanced)
+
+    def test_mutate_game_uses_predrawn_signs(self, monkeypatch):
+        """Test that pre-drawn mixed signs are used when the fixed shifts leave the range"""
+        balancer = GameBalancer()
+        monkeypatch.setattr(balancer._validator, "validate_basic", lambda *args, **kwargs: True)
+        base_game = np.array([1, 11, 21, 31, 41, 60], dtype=np.int8)
+        # +1 (61) e -1 (0) saem do intervalo: só a linha de sinais sorteados pode gerar o jogo
+        mixed_signs = np.tile(np.array([1, 1, -1, -1, 1, -1]), (5, 1))
+
+        mutated = balancer._mutate_game_to_region(
+            base_game, 2, [], np.random.RandomState(0), GameConstraints(numbers_per_game=6), [], set(), None,
+            mixed_signs
+        )
+
+        assert mutated == [2, 12, 20, 30, 42, 59]
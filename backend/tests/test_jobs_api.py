@@ -0,0 +1,59 @@
+"""
+API tests for job downloads
+Single-file results are served from the path saved during the job
+"""
+import pytest
+from datetime import datetime
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import jobs
+from app.models.jobs import JobInfo, JobStatus
+from app.services.job_processor import job_processor
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/api/v1")
+    return TestClient(app)
+
+
+def _completed_job(monkeypatch, process_id: str, result):
+    """Register a completed job with the given result in the job processor"""
+    now = datetime.now()
+    job_info = JobInfo(process_id=process_id, status=JobStatus.COMPLETED, created_at=now, updated_at=now)
+    monkeypatch.setitem(job_processor._jobs, process_id, job_info)
+    monkeypatch.setitem(job_processor._job_results, process_id, result)
+
+
+class TestJobDownload:
+    """Test GET /jobs/{process_id}/download"""
+
+    def test_download_serves_saved_file(self, client, monkeypatch, tmp_path):
+        """Test that a single-file result is streamed from its saved path"""
+        saved = tmp_path / "saved.xlsx"
+        saved.write_bytes(b"excel-bytes")
+        _completed_job(monkeypatch, "cccc3333-job", str(saved))
+
+        response = client.get("/api/v1/jobs/cccc3333-job/download")
+
+        assert response.status_code == 200
+        assert response.content == b"excel-bytes"
+
+    def test_download_of_deleted_saved_file_returns_404(self, client, monkeypatch, tmp_path):
+        """Test that a saved file deleted after the job returns FILE_NOT_FOUND instead of failing"""
+        saved = tmp_path / "saved.xlsx"
+        saved.write_bytes(b"excel-bytes")
+        _completed_job(monkeypatch, "dddd4444-job", str(saved))
+        saved.unlink()
+
+        response = client.get("/api/v1/jobs/dddd4444-job/download")
+
+        assert response.status_code == 404
+        assert response.json()["code"] == "FILE_NOT_FOUND"
+
+        _completed_job(monkeypatch, "dddd4444-job", [str(saved)])
+        response = client.get("/api/v1/jobs/dddd4444-job/download", params={"file_index": 1})
+
+        assert response.status_code == 404
+        assert response.json()["code"] == "FILE_NOT_FOUND"